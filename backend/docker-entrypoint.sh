@@ -2,4 +2,5 @@
 python manage.py collectstatic --noinput
 python manage.py makemigrations
 python manage.py migrate
-gunicorn mysite.wsgi
\ No newline at end of file
+python manage.py createcachetable
+exec gunicorn
\ No newline at end of file
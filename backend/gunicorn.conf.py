@@ -1,6 +1,95 @@
 # gunicorn.conf.py
-workers = 4
+import gc
+import math
+import os
+
+
+def env_flag(name, default):
+    return os.environ.get(name, default).lower() == "true"
+
+
+def available_cpus():
+    """CPUs this process may run on: its affinity mask, capped by a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    # multiprocessing.cpu_count() reports every CPU on the host, however few
+    # the container is limited to.
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+wsgi_app = "mysite.wsgi:application"
 bind = "0.0.0.0:8000"
 forwarded_allow_ips = "*"
 accesslog = "-"
-access_log_format = '%({x-forwarded-for}i)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
\ No newline at end of file
+# The last field is the Server-Timing header ("-" unless SERVER_TIMING_ENABLED).
+access_log_format = '%({x-forwarded-for}i)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" "%({server-timing}o)s"'
+
+# Workers default to the usual 2 * CPUs + 1 for sync workers. With
+# GUNICORN_WORKER_CLASS=gthread each worker serves GUNICORN_THREADS requests
+# at once, so CPUs + 1 workers are enough. Either way the default stops at
+# GUNICORN_MAX_WORKERS, since every worker holds its own database pool.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+cpus = available_cpus()
+default_workers = cpus + 1 if worker_class == "gthread" else cpus * 2 + 1
+workers = int(os.environ.get("GUNICORN_WORKERS", min(default_workers, int(os.environ.get("GUNICORN_MAX_WORKERS", 12)))))
+
+# Recycle each worker after about GUNICORN_MAX_REQUESTS requests (0 never
+# does); the jitter keeps workers from all restarting at the same moment.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+
+# Import Django and the apps once in the master so workers share those pages
+# copy-on-write instead of each importing its own copy. Nothing opens a
+# database connection, thread pool or listener at import time; those are all
+# created lazily inside each worker.
+preload_app = env_flag("GUNICORN_PRELOAD", "true")
+
+# ASYNC_API_VIEWS=true serves the ASGI application with uvicorn workers, and
+# mysite.settings routes the read endpoints to their async views. Database
+# work then runs on sync_to_async threads, several per worker, so the pool
+# keeps DB_POOL_MAX_SIZE (4 unless set) rather than the thread count.
+if env_flag("ASYNC_API_VIEWS", "false"):
+    wsgi_app = "mysite.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    threads = 1
+else:
+    # A sync or gthread worker uses at most one connection per thread, so a
+    # larger pool would only hold idle connections open (read by settings,
+    # which is loaded after this file).
+    os.environ.setdefault("DB_POOL_MAX_SIZE", str(threads))
+
+# Connections this container may hold at most: warn at startup when the
+# workers' pools could exceed it. Postgres allows 100 by default, and the
+# other containers, migrations and admin sessions need some of them.
+db_connection_budget = int(os.environ.get("DB_CONNECTION_BUDGET", 40))
+
+
+def on_starting(server):
+    if env_flag("DB_POOL_ENABLED", "true"):
+        per_worker = int(os.environ.get("DB_POOL_MAX_SIZE", 4))
+    else:
+        per_worker = threads
+    if workers * per_worker > db_connection_budget:
+        server.log.warning(
+            "%d workers x %d database connections exceeds DB_CONNECTION_BUDGET=%d; "
+            "lower GUNICORN_WORKERS or DB_POOL_MAX_SIZE",
+            workers, per_worker, db_connection_budget,
+        )
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach: a
+    # collection in a worker would otherwise write to every tracked object's
+    # header and un-share the preloaded pages.
+    if preload_app:
+        gc.freeze()
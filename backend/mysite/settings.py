@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'tasks',
     'secret_data',
     'encrypted_model_fields',
@@ -55,18 +56,40 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'secret_data.timing.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'secret_data.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'secret_data.middleware.CsrfViewMiddleware',
+    'secret_data.middleware.AuthenticationMiddleware',
+    'secret_data.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'axes.middleware.AxesMiddleware',
 ]
 
+# JWT-only routes. The session, CSRF, auth and messages middleware above
+# (secret_data/middleware.py) pass these straight through; /api/admin/ and
+# the login endpoint /api/token/ still get all of them. AxesMiddleware stays
+# stock: its system check looks for it by name, and it only inspects the
+# request after the view has run. XFrameOptionsMiddleware stays stock too:
+# setting one header is cheap, and the browsable API renders these routes as
+# HTML that should not be framed.
+API_ROUTE_PREFIXES = (
+    '/api/tasks/',
+    '/api/secret/',
+    '/api/events/',
+    '/api/token/refresh/',
+    '/api/token/revoke/',
+)
+
+# check --deploy looks for CsrfViewMiddleware by its stock path. The subclass
+# in secret_data.middleware is the same middleware for every route outside
+# API_ROUTE_PREFIXES, and those routes authenticate with bearer tokens,
+# which a cross-site request can't send.
+SILENCED_SYSTEM_CHECKS = ['security.W003']
+
 ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
@@ -100,9 +123,89 @@ DATABASES = {
         'PASSWORD': os.environ['DB_PASSWORD'],
         'HOST': os.environ['DB_HOST'],
         'PORT': os.environ['DB_PORT'],
+        # Checked before reuse, so a connection dropped by the server is
+        # replaced instead of failing a request.
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Connection reuse. With DB_POOL_ENABLED each worker process keeps a psycopg
+# 3 pool of DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE connections (one per thread
+# is enough, and gunicorn.conf.py defaults it to the thread count for sync
+# and gthread workers; requests wait up to DB_POOL_TIMEOUT seconds for one
+# beyond that). Connections are recycled after DB_POOL_MAX_LIFETIME seconds, and
+# idle ones above the minimum are closed after DB_POOL_MAX_IDLE. Pool usage
+# is reported by /api/secret/metrics/. With the pool off, DB_CONN_MAX_AGE
+# sets Django's plain persistent connections (0 connects per request).
+DB_POOL_ENABLED = os.environ.get('DB_POOL_ENABLED', 'true').lower() == 'true'
+if DB_POOL_ENABLED:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'name': 'default',
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 0))
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# 'default' is a table of the application database (created by
+# createcachetable), shared by every worker in every container. Nothing on
+# the request path reads it: group names and authenticated users are cached
+# per worker and invalidated through AuthChange (secret_data/authentication.py).
+# Tests use the same backends, so query counts in tests match production.
+# 'responses' holds rendered list responses, which contain decrypted data, so
+# it stays in process memory. Its budget is MAX_ENTRIES entries of at most
+# RESPONSE_CACHE_MAX_ENTRY_BYTES each.
+
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRY_BYTES', 2 * 1024 * 1024))
+
+RESPONSE_CACHE = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'responses',
+    'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300)),
+    'OPTIONS': {
+        'MAX_ENTRIES': max(RESPONSE_CACHE_MAX_BYTES // RESPONSE_CACHE_MAX_ENTRY_BYTES, 1),
+    },
+}
+
+# 'axes' holds django-axes' failed-login counts (AXES_HANDLER below) in a
+# table of the application database, created by createcachetable. Every
+# worker and container shares it without a cache service, and its add() is
+# atomic. Entries never expire on their own, so MAX_ENTRIES is high enough
+# that culling never drops a live lockout.
+AXES_CACHE_CONFIG = {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'axes_cache',
+    'OPTIONS': {
+        'MAX_ENTRIES': int(os.environ.get('AXES_CACHE_MAX_ENTRIES', 100000)),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'secure_tasker_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 20000)),
+        },
+    },
+    'responses': RESPONSE_CACHE,
+    'axes': AXES_CACHE_CONFIG,
+}
+
+# Users whose group names each worker keeps cached. A cached entry is checked
+# against the user's AuthChange row on every request.
+GROUP_CACHE_SIZE = int(os.environ.get('GROUP_CACHE_SIZE', 5000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -124,11 +227,22 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTHENTICATION_BACKENDS = [
     # AxesStandaloneBackend should be the first backend in the AUTHENTICATION_BACKENDS list.
-    'axes.backends.AxesStandaloneBackend',
+    # This subclass adds aauthenticate() for AsyncTokenObtainPairView.
+    'secret_data.authentication.AsyncAxesBackend',
 
     # Django ModelBackend is the default authentication backend.
     'django.contrib.auth.backends.ModelBackend',
 ]
+
+# Failed logins are counted in the 'axes' cache rather than AccessAttempt
+# rows: one keyed lookup per login and one write per failure, where the
+# database handler aggregates and rewrites attempt rows. The lockout rules
+# are unchanged, but the admin no longer lists attempts; lift a lockout with
+# axes_reset_ip or axes_reset_username. Set
+# AXES_HANDLER=axes.handlers.database.AxesDatabaseHandler to switch back.
+AXES_HANDLER = os.environ.get('AXES_HANDLER', 'axes.handlers.cache.AxesCacheHandler')
+AXES_CACHE = 'axes'
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -152,10 +266,75 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'secret_data.authentication.RevocableJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'secret_data.timing.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
+# Server-Timing header (secret_data/timing.py) on every response, breaking
+# each request down into db, decrypt, serialize, render and app time with
+# query and decryption counts; gunicorn's access log records it too. Off by
+# default, since the header exposes internal timings to every client.
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+
+# Cursor pagination for the list endpoints. Clients that send ?page_size= or
+# ?cursor= are always paginated; API_PAGINATE_LISTS paginates everyone else too
+# once the frontend has moved off the bare-list responses.
+API_PAGINATE_LISTS = os.environ.get('API_PAGINATE_LISTS', 'false').lower() == 'true'
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+# Rows read, decrypted and written per chunk by ?stream=true list exports.
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 2000))
+
+# Supervisor bulk endpoints: items accepted per request and rows per INSERT/UPDATE.
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 500))
+
+# Delta sync (?since= on /api/tasks/): changes are re-sent from this many
+# seconds before the watermark so rows committed out of timestamp order are
+# not missed, and tombstones older than the retention window are purged
+# (purge_task_tombstones); older watermarks must fall back to a full fetch.
+DELTA_SYNC_OVERLAP_SECONDS = int(os.environ.get('DELTA_SYNC_OVERLAP_SECONDS', 5))
+TASK_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Supervisor task stats (/api/tasks/supervisor/stats/): the default and the
+# largest date range, in days, a single request may cover.
+STATS_DEFAULT_DAYS = int(os.environ.get('STATS_DEFAULT_DAYS', 30))
+STATS_MAX_DAYS = int(os.environ.get('STATS_MAX_DAYS', 366))
+
+# Change events (/api/events/): writes NOTIFY this Postgres channel and each
+# ASGI worker LISTENs once and fans out to its SSE subscribers. Subscribers
+# falling more than EVENTS_QUEUE_SIZE events behind get a resync instead.
+EVENTS_ENABLED = os.environ.get('EVENTS_ENABLED', 'true').lower() == 'true'
+EVENTS_CHANNEL = os.environ.get('EVENTS_CHANNEL', 'secure_tasker_changes')
+EVENTS_HEARTBEAT_SECONDS = int(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 5000))
+
+# Per-worker LRU of decrypted Task.description values (see secret_data/fields.py).
+DECRYPTION_CACHE_ENABLED = os.environ.get('DECRYPTION_CACHE_ENABLED', 'true').lower() == 'true'
+DECRYPTION_CACHE_SIZE = int(os.environ.get('DECRYPTION_CACHE_SIZE', 10000))
+
+# Thread pool used to batch-decrypt list responses; batches smaller than the
+# threshold are decrypted on the request thread.
+DECRYPTION_POOL_SIZE = int(os.environ.get('DECRYPTION_POOL_SIZE', 4))
+DECRYPTION_PARALLEL_THRESHOLD = int(os.environ.get('DECRYPTION_PARALLEL_THRESHOLD', 1000))
+
+# ASGI deployment: with ASYNC_API_VIEWS the task and secret read endpoints
+# route to their async views (secret_data/asyncapi.py), and gunicorn.conf.py
+# serves mysite.asgi with uvicorn workers. Decryption and serialization for
+# those views run on the DECRYPTION_POOL_SIZE threads above.
+ASYNC_API_VIEWS = os.environ.get('ASYNC_API_VIEWS', 'false').lower() == 'true'
+
+# Key for the blind keyword index over task descriptions (tasks/keywords.py).
+# Empty derives one from ENCRYPTION_KEY (the first key, when that is a
+# rotation list). Changing either requires running rebuild_task_keywords.
+KEYWORD_INDEX_KEY = os.environ.get('KEYWORD_INDEX_KEY', '')
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -194,6 +373,20 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_LIFETIME_LATE_USER': timedelta(days=30),
 }
 
+# Revoked JWTs (secret_data/revocation.py). Each worker keeps a Bloom filter of
+# revoked jtis and re-syncs it from the database at this interval in seconds.
+TOKEN_REVOCATION_SYNC_INTERVAL = int(os.environ.get('TOKEN_REVOCATION_SYNC_INTERVAL', 5))
+TOKEN_REVOCATION_BLOOM_BITS = int(os.environ.get('TOKEN_REVOCATION_BLOOM_BITS', 2 ** 20))
+TOKEN_REVOCATION_BLOOM_HASHES = int(os.environ.get('TOKEN_REVOCATION_BLOOM_HASHES', 7))
+
+# Per-worker cache of verified JWTs and their user (secret_data/authentication.py).
+# Each worker re-reads which users changed (AuthChange) at this interval in
+# seconds, so a deactivation made through another worker or container takes
+# up to that long to end cached sessions there.
+AUTH_CACHE_ENABLED = os.environ.get('AUTH_CACHE_ENABLED', 'true').lower() == 'true'
+AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', 5000))
+AUTH_CHANGE_SYNC_INTERVAL = int(os.environ.get('AUTH_CHANGE_SYNC_INTERVAL', 5))
+
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage"
@@ -14,15 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from secret_data.authentication import RevocableTokenRefreshSerializer
+from secret_data.views import AsyncTokenObtainPairView, RevokeTokenView, ChangeStreamView
 
 
 urlpatterns = [
     path('api/admin/', admin.site.urls),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/', (AsyncTokenObtainPairView if settings.ASYNC_API_VIEWS else TokenObtainPairView).as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TokenRefreshView.as_view(serializer_class=RevocableTokenRefreshSerializer), name='token_refresh'),
+    path('api/token/revoke/', RevokeTokenView.as_view(), name='token_revoke'),
+    path('api/events/', ChangeStreamView.as_view(), name='events'),
     path('api/secret/', include('secret_data.urls')),
     path('api/tasks/', include('tasks.urls')),
 ]
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import SecretLevelData
+from .models import SecretLevelData, RevokedToken
 # Register your models here.
-admin.site.register(SecretLevelData)
\ No newline at end of file
+admin.site.register(SecretLevelData)
+admin.site.register(RevokedToken)
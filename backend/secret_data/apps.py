@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SecretDataConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'secret_data'
+
+    def ready(self):
+        from . import signals  # noqa: F401
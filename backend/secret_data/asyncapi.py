@@ -0,0 +1,109 @@
+"""
+Async variants of the read endpoints, routed in place of the DRF views when
+ASYNC_API_VIEWS is on and served by mysite.asgi under uvicorn workers (see
+gunicorn.conf.py).
+
+A request waiting on Postgres then holds a coroutine rather than a whole
+sync worker. Database reads go through Django's async ORM (or, for DRF's
+paginators, a thread via sync_to_async), and decryption and serialization,
+which are CPU-bound, run on the worker's decryption pool so they never
+block the event loop.
+"""
+import asyncio
+import contextvars
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+
+from .authentication import RevocableJWTAuthentication
+from .fields import get_executor
+from .permissions import get_group_names
+from .timing import TimedJSONRenderer
+
+
+async def offload(func, *args):
+    """
+    Run CPU-bound func(*args) (decrypting, serializing) off the event loop.
+    At most DECRYPTION_POOL_SIZE calls run at once per worker; others queue.
+    """
+    # The request's context (e.g. its Server-Timing record) goes along too.
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), partial(context.run, func, *args))
+
+
+def render(data, status=200):
+    # Same renderer as the DRF views, so bodies are byte-for-byte identical.
+    return HttpResponse(TimedJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def error_response(exc, authenticate_header=None):
+    """The response DRF's exception handler gives for an APIException."""
+    response = render(exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}, exc.status_code)
+    if authenticate_header and isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = authenticate_header
+    return response
+
+
+class AsyncAPIView(View):
+    """
+    Base class for an async GET in front of an existing DRF view; subclasses
+    define an async get().
+
+    GET authenticates and checks required_group the way the DRF view's
+    permission classes do, answers conditional requests from etag_func, and
+    maps DRF exceptions and Http404 to the same status codes and bodies.
+    Every other method is handed to sync_view on a worker thread, so writes
+    keep their DRF behavior unchanged.
+    """
+    sync_view = None
+    required_group = None
+    etag_func = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        cls._sync_handler = staticmethod(cls.sync_view.as_view())
+        # Writes are forwarded to the DRF view, which is CSRF-exempt too.
+        return csrf_exempt(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_to_async(self._sync_handler)(request, *args, **kwargs)
+
+        request.query_params = request.GET
+        authenticator = RevocableJWTAuthentication()
+        try:
+            etag = await sync_to_async(self.check_request)(authenticator, request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+
+            response = await self.get(request, *args, **kwargs)
+            if etag is not None:
+                response.headers.setdefault('ETag', etag)
+            return response
+
+        except Http404:
+            return render({'detail': exceptions.NotFound.default_detail}, status=404)
+        except exceptions.APIException as e:
+            return error_response(e, authenticator.authenticate_header(request))
+
+    def check_request(self, authenticator, request, *args, **kwargs):
+        # Authentication, the group check and the ETag lookup all touch the
+        # database, so they share one trip to a worker thread.
+        result = authenticator.authenticate(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = result
+        if self.required_group not in get_group_names(request.user):
+            raise exceptions.PermissionDenied()
+        if self.etag_func is None:
+            return None
+        etag = self.etag_func(request, *args, **kwargs)
+        return quote_etag(etag) if etag is not None else None
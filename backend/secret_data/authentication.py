@@ -0,0 +1,227 @@
+import hashlib
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from axes.backends import AxesStandaloneBackend
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .fields import DecryptionCache
+from .models import AuthChange
+from .revocation import revocation_list
+
+# User fields kept in the cached snapshot; anything else is loaded lazily.
+SNAPSHOT_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email', 'is_active', 'is_staff', 'is_superuser')
+
+
+class AuthChanges:
+    """
+    Per-worker view of AuthChange.
+
+    Cached authentications remember the stamp() of their user when they
+    were loaded and are dropped once it moves. Like RevocationList, the
+    worker pulls rows changed since its last sync every
+    AUTH_CHANGE_SYNC_INTERVAL seconds rather than asking on every request,
+    so a change committed through another worker applies here within one
+    interval. Changes committed through this worker apply immediately.
+    Group names can't wait for a sync, so they check read() instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamps = {}
+        self._synced_at = None
+        self._watermark = None
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self._synced_at is not None and now - self._synced_at < settings.AUTH_CHANGE_SYNC_INTERVAL:
+            return
+
+        with self._lock:
+            if self._watermark is None:
+                # Nothing is cached before the first sync, so older changes
+                # don't matter.
+                self._watermark = timezone.now()
+            # Overlap by one interval so rows committed late by a slow
+            # transaction are still picked up; re-reading one is harmless.
+            overlap = timedelta(seconds=settings.AUTH_CHANGE_SYNC_INTERVAL)
+            rows = AuthChange.objects.filter(changed_at__gte=self._watermark - overlap)
+            for user_id, changed_at in rows.values_list('user_id', 'changed_at'):
+                self._stamps[user_id] = changed_at
+                self._watermark = max(self._watermark, changed_at)
+            self._synced_at = now
+
+    def add(self, user_ids, changed_at):
+        with self._lock:
+            for user_id in user_ids:
+                self._stamps[user_id] = changed_at
+
+    def stamp(self, user_id):
+        """When user_id last changed as far as this worker knows, or None."""
+        self.sync()
+        return self._stamps.get(user_id)
+
+    def read(self, user_id):
+        """When user_id last changed, read from their AuthChange row, or None."""
+        return AuthChange.objects.filter(user_id=user_id).values_list('changed_at', flat=True).first()
+
+
+auth_changes = AuthChanges()
+
+
+def record_auth_change(user_ids):
+    """
+    Stamp a change to the accounts or group memberships of user_ids. Cached
+    group names for them stop matching in every worker once the change
+    commits; cached authentications do so in this worker then, and in every
+    other worker at its next sync.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    changed_at = timezone.now()
+    AuthChange.objects.bulk_create(
+        [AuthChange(user_id=user_id, changed_at=changed_at) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=['user_id'],
+        update_fields=['changed_at'],
+    )
+    transaction.on_commit(lambda: auth_changes.add(user_ids, changed_at))
+
+
+class AuthenticationCache(DecryptionCache):
+    """
+    Per-worker LRU mapping a SHA-256 of the raw JWT to its validated token,
+    a snapshot of the user row and the user's AuthChanges stamp, so repeat
+    requests skip both signature verification and the auth_user query. It
+    also times authentications with and without a usable entry.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    def discard(self, key):
+        # A stale entry was counted as a hit by get(); it is really a miss.
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.hits -= 1
+                self.misses += 1
+
+    def record(self, hit, seconds):
+        with self._lock:
+            if hit:
+                self.hit_seconds += seconds
+            else:
+                self.miss_seconds += seconds
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self.hit_seconds = self.miss_seconds = 0.0
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            average_hit = self.hit_seconds / self.hits if self.hits else 0.0
+            average_miss = self.miss_seconds / self.misses if self.misses else 0.0
+        return {
+            **stats,
+            'average_hit_ms': average_hit * 1000,
+            'average_miss_ms': average_miss * 1000,
+            # Estimated time hits saved compared with the uncached path.
+            'saved_ms': max(average_miss - average_hit, 0.0) * stats['hits'] * 1000,
+        }
+
+
+auth_cache = AuthenticationCache(settings.AUTH_CACHE_SIZE)
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that rejects tokens revoked through RevokeTokenView and
+    caches verified tokens with their user in auth_cache.
+    """
+
+    def authenticate(self, request):
+        if not settings.AUTH_CACHE_ENABLED:
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        start = time.perf_counter()
+        key = hashlib.sha256(raw_token).digest()
+        entry = auth_cache.get(key)
+        if entry is not None:
+            validated_token, snapshot, stamp = entry
+            if validated_token['exp'] > time.time() and stamp == auth_changes.stamp(snapshot['id']):
+                self.check_revoked(validated_token)
+                user = self.user_from_snapshot(snapshot)
+                auth_cache.record(True, time.perf_counter() - start)
+                return user, validated_token
+            auth_cache.discard(key)
+
+        validated_token = self.get_validated_token(raw_token)
+        # Read the stamp before loading the user so a concurrent change
+        # can't be cached under the new stamp.
+        user_id = self.user_model._meta.pk.to_python(validated_token.get(api_settings.USER_ID_CLAIM))
+        stamp = auth_changes.stamp(user_id)
+        user = self.get_user(validated_token)
+        snapshot = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+        auth_cache.set(key, (validated_token, snapshot, stamp))
+        auth_cache.record(False, time.perf_counter() - start)
+        return user, validated_token
+
+    def user_from_snapshot(self, snapshot):
+        """Rebuild the cached user as if loaded with only(*SNAPSHOT_FIELDS)."""
+        # from_db() pairs names and values positionally and expects them in
+        # the model's concrete field order, not the snapshot's.
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in snapshot]
+        return self.user_model.from_db('default', field_names, [snapshot[name] for name in field_names])
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        self.check_revoked(validated_token)
+        return validated_token
+
+    def check_revoked(self, validated_token):
+        if revocation_list.is_revoked(validated_token['jti']):
+            raise InvalidToken({
+                'detail': 'Token has been revoked.',
+                'code': 'token_revoked',
+            })
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if revocation_list.is_revoked(refresh['jti']):
+            raise TokenError('Token has been revoked.')
+        return super().validate(attrs)
+
+
+class AsyncAxesBackend(AxesStandaloneBackend):
+    """
+    AxesStandaloneBackend that also works with aauthenticate(), which the
+    async token view uses so the password hash runs off the event loop.
+    Lockout checks are unchanged; they just run on a worker thread.
+    """
+
+    async def aauthenticate(self, request, **credentials):
+        return await sync_to_async(self.authenticate)(request, **credentials)
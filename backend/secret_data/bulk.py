@@ -0,0 +1,123 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import FieldError, ValidationError as DjangoValidationError
+from django.db.models import F
+from rest_framework import serializers
+
+from .fields import CachedEncryptedTextField, encrypt_instances
+from .models import VersionedModel
+
+
+def bulk_items(data):
+    """Check that a bulk payload is a non-empty list within BULK_MAX_ITEMS."""
+    if not isinstance(data, list) or not data:
+        raise serializers.ValidationError({'detail': 'Expected a non-empty list of items.'})
+    if len(data) > settings.BULK_MAX_ITEMS:
+        raise serializers.ValidationError({'detail': f'At most {settings.BULK_MAX_ITEMS} items per request.'})
+    return data
+
+
+def bulk_partial_update(queryset, serializer_class, items):
+    """
+    Apply a list of {'id': ..., <fields>} partial updates.
+
+    Every item is validated against its row first. If any item fails, nothing
+    is written and a ValidationError carries the errors keyed by item index,
+    the same shape ListSerializer uses for bulk creates. Otherwise rows are
+    grouped by the set of fields they change and written with one bulk_update()
+    per group, with encrypted fields batch-encrypted beforehand. Returns each
+    updated id's validated data, in request order.
+    """
+    model = queryset.model
+    ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+    instances = queryset.in_bulk([pk for pk in ids if isinstance(pk, int)])
+
+    errors = {}
+    seen = set()
+    groups = defaultdict(list)
+    updated = {}
+    for index, (item, pk) in enumerate(zip(items, ids)):
+        if not isinstance(pk, int):
+            errors[index] = {'id': ['A valid integer is required.']}
+            continue
+        if pk in seen:
+            errors[index] = {'id': ['Duplicate id.']}
+            continue
+        seen.add(pk)
+
+        instance = instances.get(pk)
+        if instance is None:
+            errors[index] = {'id': ['Not found.']}
+            continue
+
+        serializer = serializer_class(instance, data=item, partial=True)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+            continue
+
+        updated[pk] = dict(serializer.validated_data)
+        for attr, value in serializer.validated_data.items():
+            setattr(instance, attr, value)
+        groups[tuple(sorted(serializer.validated_data))].append(instance)
+
+    if errors:
+        raise serializers.ValidationError({'errors': errors})
+
+    encrypted_fields = {
+        field.name for field in model._meta.concrete_fields if isinstance(field, CachedEncryptedTextField)
+    }
+    # bulk_update() skips pre_save(), so stamp auto_now fields (Task.updated_at) here.
+    auto_now_fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    for fields, objs in groups.items():
+        if not fields:
+            continue
+        for field_name in encrypted_fields.intersection(fields):
+            encrypt_instances(objs, field_name)
+        for field in auto_now_fields:
+            fields = (*fields, field.name)
+            for obj in objs:
+                field.pre_save(obj, add=False)
+        if issubclass(model, VersionedModel):
+            fields = (*fields, 'version')
+            for obj in objs:
+                obj.version = F('version') + 1
+        model.objects.bulk_update(objs, fields, batch_size=settings.BULK_BATCH_SIZE)
+
+    return updated
+
+
+def bulk_delete_queryset(queryset, data, filter_fields):
+    """
+    Narrow queryset to the rows named by {'ids': [...]} or matched by
+    {'filter': {...}}, where filter keys are limited to filter_fields.
+    """
+    if not isinstance(data, dict) or ('ids' in data) == ('filter' in data):
+        raise serializers.ValidationError({'detail': "Provide exactly one of 'ids' or 'filter'."})
+
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            raise serializers.ValidationError({'ids': ['Expected a non-empty list of integer ids.']})
+        if len(ids) > settings.BULK_MAX_ITEMS:
+            raise serializers.ValidationError({'ids': [f'At most {settings.BULK_MAX_ITEMS} ids per request.']})
+        queryset = queryset.filter(pk__in=ids)
+    else:
+        filters = data['filter']
+        if not isinstance(filters, dict) or not filters:
+            raise serializers.ValidationError({'filter': ['Expected a non-empty object.']})
+        unknown = set(filters) - set(filter_fields)
+        if unknown:
+            raise serializers.ValidationError({'filter': [f"Choose from: {', '.join(filter_fields)}."]})
+        try:
+            queryset = queryset.filter(**filters)
+        except (DjangoValidationError, FieldError, ValueError, TypeError) as e:
+            raise serializers.ValidationError({'filter': [str(e)]})
+    return queryset
+
+
+def bulk_delete(queryset, data, filter_fields):
+    """Delete the rows chosen as in bulk_delete_queryset(). Returns the number of rows deleted."""
+    queryset = bulk_delete_queryset(queryset, data, filter_fields)
+    _, deleted = queryset.delete()
+    return deleted.get(queryset.model._meta.label, 0)
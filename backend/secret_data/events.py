@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+
+import psycopg
+from psycopg import sql
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Groups that may see each model's events: the same groups that can list it
+# (TaskList/SecretLevelView for Secret, the supervisor views for Supervisor).
+EVENT_GROUPS = {
+    'tasks.task': frozenset({'Secret', 'Supervisor'}),
+    'secret_data.secretleveldata': frozenset({'Secret', 'Supervisor'}),
+}
+
+# Sent to subscribers that may have missed events (slow reader, listener
+# reconnect); clients catch up with a delta sync instead.
+RESYNC = {'action': 'resync'}
+
+
+def format_event(event):
+    """Serialize an event as an SSE frame."""
+    name = 'resync' if event is RESYNC else 'change'
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+
+RESYNC_ITEM = (RESYNC, format_event(RESYNC))
+
+
+def publish_change(label, action, pk=None):
+    """
+    NOTIFY every worker's ChangeBroker that a row (or, with pk=None, a whole
+    collection) changed. Postgres only delivers the notification when the
+    surrounding transaction commits, so rolled-back writes are never announced.
+    Payloads carry ids only, never field values.
+    """
+    if not settings.EVENTS_ENABLED or connection.vendor != 'postgresql':
+        return
+    payload = json.dumps({'model': label, 'action': action, 'id': pk})
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [settings.EVENTS_CHANNEL, payload])
+
+
+def listen_conninfo():
+    db = connection.settings_dict
+    params = {
+        'dbname': db['NAME'],
+        'user': db['USER'],
+        'password': db['PASSWORD'],
+        'host': db['HOST'],
+        'port': db['PORT'],
+    }
+    return psycopg.conninfo.make_conninfo(**{key: value for key, value in params.items() if value})
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue of (event, frame) pairs that the
+    broker pushes into.
+    """
+
+    __slots__ = ('queue', 'overflowed')
+
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def push(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        if self.queue.empty():
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        else:
+            # A queued event is returned even when the timeout has run out.
+            item = self.queue.get_nowait()
+        if self.overflowed:
+            # Drop the backlog; one resync replaces everything that was missed.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = False
+            return RESYNC_ITEM
+        return item
+
+
+class ChangeBroker:
+    """
+    Per-process fan-out of change events to SSE subscribers.
+
+    A single LISTEN connection per worker feeds every subscriber in that
+    worker, so an idle client costs one queue and one suspended coroutine,
+    not a database connection. The listener runs only while someone is
+    subscribed.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self._task = None
+        self._loop = None
+
+    def subscribe(self):
+        subscription = Subscription(settings.EVENTS_QUEUE_SIZE)
+        self.subscribers.add(subscription)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._task = loop.create_task(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed change event: %r", payload)
+            return
+        # Serialized once here rather than once per subscriber.
+        item = (event, format_event(event))
+        for subscription in tuple(self.subscribers):
+            subscription.push(item)
+
+    async def _listen(self):
+        delay = 1
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(listen_conninfo(), autocommit=True)
+                async with conn:
+                    await conn.execute(sql.SQL('LISTEN {}').format(sql.Identifier(settings.EVENTS_CHANNEL)))
+                    delay = 1
+                    async for notify in conn.notifies():
+                        self.dispatch(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change listener disconnected; retrying in %ss", delay)
+                for subscription in tuple(self.subscribers):
+                    subscription.push(RESYNC_ITEM)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def stats(self):
+        return {
+            'subscribers': len(self.subscribers),
+            'listening': self._task is not None and not self._task.done(),
+        }
+
+
+broker = ChangeBroker()
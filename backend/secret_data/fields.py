@@ -0,0 +1,245 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.fernet import InvalidToken
+from django.conf import settings
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from encrypted_model_fields.fields import EncryptedTextField, decrypt_str, encrypt_str
+
+from .timing import count, phase
+
+logger = logging.getLogger(__name__)
+
+
+class DecryptionCache:
+    """
+    Bounded LRU of decrypted values, keyed by a SHA-256 digest of the ciphertext.
+
+    Each gunicorn worker has its own instance, so plaintext only ever lives in
+    that process's memory. Fernet tokens carry a random IV, so an updated row
+    gets a new key and stale entries simply age out. The per-worker caches in
+    secret_data.authentication and secret_data.permissions reuse this LRU.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+decryption_cache = DecryptionCache(settings.DECRYPTION_CACHE_SIZE)
+
+
+def _cache_key(ciphertext):
+    return hashlib.sha256(ciphertext.encode('utf-8')).digest()
+
+
+def decrypt(ciphertext):
+    """Decrypt a stored value, going through the per-process cache when enabled."""
+    with phase('decrypt'):
+        count('decrypt')
+        if not settings.DECRYPTION_CACHE_ENABLED:
+            return decrypt_str(ciphertext)
+
+        key = _cache_key(ciphertext)
+        plaintext = decryption_cache.get(key)
+        if plaintext is None:
+            plaintext = decrypt_str(ciphertext)
+            decryption_cache.set(key, plaintext)
+        return plaintext
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pool_thread = threading.local()
+
+
+def _mark_pool_thread():
+    _pool_thread.active = True
+
+
+def get_executor():
+    """
+    This worker's pool of DECRYPTION_POOL_SIZE threads for CPU-bound work:
+    batch decryption here, and async views' offload() in secret_data.asyncapi.
+    """
+    # Created lazily so each forked gunicorn worker builds its own pool.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DECRYPTION_POOL_SIZE,
+                thread_name_prefix='decrypt',
+                initializer=_mark_pool_thread,
+            )
+        return _executor
+
+
+def _decrypt_chunk(ciphertexts):
+    return [decrypt_str(ciphertext) for ciphertext in ciphertexts]
+
+
+def _encrypt_chunk(plaintexts):
+    return [encrypt_str(plaintext).decode('utf-8') for plaintext in plaintexts]
+
+
+def _map_chunks(func, items):
+    # Split items into one chunk per pool thread when the batch is large
+    # enough to be worth it; otherwise run on the calling thread. A pool
+    # thread (an offloaded serialization) runs them itself too: waiting on
+    # its own pool could deadlock once every thread is waiting.
+    pool_size = settings.DECRYPTION_POOL_SIZE
+    if pool_size > 1 and len(items) >= settings.DECRYPTION_PARALLEL_THRESHOLD and not getattr(_pool_thread, 'active', False):
+        chunk_size = -(-len(items) // pool_size)
+        chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+        return [result for chunk in get_executor().map(func, chunks) for result in chunk]
+    return func(items)
+
+
+def decrypt_many(ciphertexts):
+    """
+    Decrypt a batch of ciphertexts, returning plaintexts in the same order.
+
+    Cache hits are served directly; the misses are split into one chunk per
+    pool thread once there are at least DECRYPTION_PARALLEL_THRESHOLD of them,
+    otherwise they are decrypted on the calling thread. As in
+    CachedEncryptedTextField, an InvalidToken is logged and raised rather
+    than swallowed so views can report the failure.
+    """
+    with phase('decrypt'):
+        count('decrypt', len(ciphertexts) - ciphertexts.count(None))
+        use_cache = settings.DECRYPTION_CACHE_ENABLED
+        results = [None] * len(ciphertexts)
+        pending = []
+
+        for index, ciphertext in enumerate(ciphertexts):
+            if ciphertext is None:
+                continue
+            if use_cache:
+                plaintext = decryption_cache.get(_cache_key(ciphertext))
+                if plaintext is not None:
+                    results[index] = plaintext
+                    continue
+            pending.append(index)
+
+        try:
+            plaintexts = _map_chunks(_decrypt_chunk, [ciphertexts[index] for index in pending])
+        except InvalidToken:
+            logger.error("Failed to decrypt a batch of %d stored values", len(pending))
+            raise
+
+        for index, plaintext in zip(pending, plaintexts):
+            results[index] = plaintext
+            if use_cache:
+                decryption_cache.set(_cache_key(ciphertexts[index]), plaintext)
+
+        return results
+
+
+class Ciphertext(str):
+    """A value that is already encrypted; CachedEncryptedTextField stores it as-is."""
+
+
+def encrypt_many(plaintexts):
+    """
+    Encrypt a batch of strings on the decryption pool, returning Ciphertext
+    values in the same order. The plaintexts are also cached under their new
+    ciphertexts, since they are usually read back soon after being written.
+    """
+    ciphertexts = [Ciphertext(ciphertext) for ciphertext in _map_chunks(_encrypt_chunk, [str(text) for text in plaintexts])]
+    if settings.DECRYPTION_CACHE_ENABLED:
+        for plaintext, ciphertext in zip(plaintexts, ciphertexts):
+            decryption_cache.set(_cache_key(ciphertext), str(plaintext))
+    return ciphertexts
+
+
+def encrypt_instances(instances, field_name):
+    """Replace field_name on each instance with its batch-encrypted Ciphertext."""
+    instances = [instance for instance in instances if getattr(instance, field_name) is not None]
+    ciphertexts = encrypt_many([getattr(instance, field_name) for instance in instances])
+    for instance, ciphertext in zip(instances, ciphertexts):
+        setattr(instance, field_name, ciphertext)
+
+
+def defer_decryption(queryset, field_name):
+    """
+    Select field_name's raw ciphertext as <field_name>_ciphertext instead of
+    decrypting it row by row on load; pair with decrypt_deferred().
+    """
+    return queryset.defer(field_name).annotate(**{
+        f'{field_name}_ciphertext': Cast(field_name, output_field=TextField()),
+    })
+
+
+def decrypt_deferred(instances, field_name):
+    """Batch-decrypt the ciphertexts selected by defer_decryption() onto the instances."""
+    attname = f'{field_name}_ciphertext'
+    instances = [instance for instance in instances if hasattr(instance, attname)]
+    plaintexts = decrypt_many([getattr(instance, attname) for instance in instances])
+    for instance, plaintext in zip(instances, plaintexts):
+        setattr(instance, field_name, plaintext)
+
+
+class CachedEncryptedTextField(EncryptedTextField):
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        try:
+            return decrypt(value)
+        except InvalidToken:
+            # EncryptedMixin.to_python would pass the ciphertext through, and
+            # views would then return it to the client.
+            logger.error("Failed to decrypt a stored %s.%s value", self.model._meta.label_lower, self.name)
+            raise
+
+    def get_db_prep_save(self, value, connection):
+        if isinstance(value, Ciphertext):
+            return str(value)
+        if hasattr(value, 'as_sql'):
+            # Expressions such as bulk_update()'s CASE are compiled, not
+            # encrypted; EncryptedMixin would encrypt their repr.
+            return value
+        return super().get_db_prep_save(value, connection)
@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from secret_data.authentication import RevocableJWTAuthentication
+from secret_data.models import RevokedToken
+from secret_data.revocation import revocation_list
+
+
+class BlacklistLookupAuthentication(JWTAuthentication):
+    # Stand-in for a per-request database check like simplejwt's blacklist app.
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        RevokedToken.objects.filter(jti=validated_token['jti']).exists()
+        return validated_token
+
+
+class Command(BaseCommand):
+    help = "Measure per-request JWT authentication overhead with and without revocation checks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--revoked', type=int, default=1000, help="Revoked tokens to seed.")
+
+    def handle(self, *args, **options):
+        # Everything runs in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            self.run(options['requests'], options['revoked'])
+            transaction.set_rollback(True)
+
+    def run(self, count, revoked):
+        user = User.objects.create_user(username='bench-auth-user', password='bench-auth-password')
+        for _ in range(revoked):
+            token = RefreshToken.for_user(user).access_token
+            RevokedToken.objects.create(jti=token['jti'], expires_at=token.current_time + token.lifetime)
+        revocation_list.sync(force=True)
+
+        access = str(RefreshToken.for_user(user).access_token)
+        request = APIRequestFactory().get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        baseline = None
+        for label, authentication in (
+            ('JWT only', JWTAuthentication()),
+            ('JWT + DB lookup', BlacklistLookupAuthentication()),
+            ('JWT + Bloom filter', RevocableJWTAuthentication()),
+        ):
+            authentication.authenticate(request)
+            start = time.perf_counter()
+            for _ in range(count):
+                authentication.authenticate(request)
+            per_request = (time.perf_counter() - start) / count * 1e6
+            baseline = baseline or per_request
+            self.stdout.write(f"{label:<20} {per_request:8.1f} us/request  ({per_request - baseline:+.1f} us)")
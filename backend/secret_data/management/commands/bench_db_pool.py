@@ -0,0 +1,99 @@
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test an API request through the WSGI handler, connecting to "
+        "Postgres per request and through the connection pool, and report "
+        "p50/p99 latency for each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tasks/?fields=id,title&page_size=10')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4],
+                            help="Concurrent requests, like threads in one worker.")
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username='bench-db-pool-user')
+        try:
+            user.groups.add(Group.objects.get_or_create(name='Secret')[0])
+            self.token = str(RefreshToken.for_user(user).access_token)
+            self.app = get_wsgi_application()
+            # Connection handling is what's measured; keep cached responses out of it.
+            with override_settings(RESPONSE_CACHE_ENABLED=False):
+                self.run(options['path'], options['requests'], options['concurrency'])
+        finally:
+            self.configure(None)
+            User.objects.filter(pk=user.pk).delete()
+
+    def configure(self, pool):
+        # Every thread's connection shares this settings dict; the pool is
+        # per process, so close it before switching modes.
+        settings_dict = connections.settings['default']
+        connections['default'].close()
+        connections['default'].close_pool()
+        settings_dict['OPTIONS'] = {**settings_dict['OPTIONS'], 'pool': pool} if pool else {
+            key: value for key, value in settings_dict['OPTIONS'].items() if key != 'pool'
+        }
+        settings_dict['CONN_MAX_AGE'] = 0
+
+    def run(self, path, count, concurrencies):
+        configured = connections.settings['default']['OPTIONS'].get('pool') or {}
+        url = urlsplit(path)
+        for concurrency in concurrencies:
+            for label, pool in (
+                ('per-request', None),
+                ('pooled', {**configured, 'max_size': max(configured.get('max_size', 1), concurrency)}),
+            ):
+                self.configure(pool)
+                # Warm up imports, caches and (when pooled) the pool itself.
+                with ThreadPoolExecutor(concurrency) as executor:
+                    list(executor.map(lambda _: self.request(url), range(concurrency * 5)))
+                    start = time.perf_counter()
+                    latencies = sorted(executor.map(lambda _: self.request(url), range(count)))
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"concurrency {concurrency:<3} {label:<12} "
+                    f"p50 {statistics.median(latencies):6.2f} ms  "
+                    f"p99 {latencies[int(len(latencies) * 0.99) - 1]:6.2f} ms  "
+                    f"{count / elapsed:7.1f} req/s"
+                )
+
+    def request(self, url):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost',
+            'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+        }
+        statuses = []
+        start = time.perf_counter()
+        # Closing the response fires request_finished, which closes the
+        # connection or returns it to the pool, as under gunicorn.
+        response = self.app(environ, lambda status, headers: statuses.append(status))
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        elapsed = (time.perf_counter() - start) * 1000
+        if not statuses[0].startswith('200'):
+            raise CommandError(f"{url.path} answered {statuses[0]}")
+        return elapsed
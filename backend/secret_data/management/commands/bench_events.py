@@ -0,0 +1,123 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from secret_data.events import publish_change
+
+
+def rss_kib(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold many concurrent /api/events/ subscribers open against a running "
+        "ASGI server and measure connect time, idle memory and fan-out latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/events/')
+        parser.add_argument('--username', required=True, help="Existing user in the Secret group.")
+        parser.add_argument('--subscribers', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=20)
+        parser.add_argument('--pid', type=int, help="Server worker pid, to report its RSS.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+        self.token = str(RefreshToken.for_user(user).access_token)
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        url = urlsplit(options['url'])
+        count = options['subscribers']
+        pid = options['pid']
+        self.connected = 0
+        self.received = {}
+
+        rss_before = rss_kib(pid) if pid else None
+        start = time.perf_counter()
+        clients = [
+            asyncio.create_task(self.subscribe(url.hostname, url.port or 80, url.path))
+            for _ in range(count)
+        ]
+        while self.connected < count:
+            failed = [client for client in clients if client.done()]
+            if failed:
+                failed[0].result()
+                raise CommandError("A subscriber disconnected before the stream opened.")
+            await asyncio.sleep(0.05)
+        self.stdout.write(f"Connected {count} subscribers in {time.perf_counter() - start:.2f}s")
+
+        if pid:
+            await asyncio.sleep(1)
+            rss_after = rss_kib(pid)
+            self.stdout.write(
+                f"Worker RSS {rss_before / 1024:.1f} MiB -> {rss_after / 1024:.1f} MiB "
+                f"({(rss_after - rss_before) / count:.1f} KiB per idle subscriber)"
+            )
+
+        latencies = []
+        for event_id in range(options['events']):
+            self.received[event_id] = []
+            sent = time.perf_counter()
+            await sync_to_async(publish_change)('tasks.task', 'updated', event_id)
+            deadline = sent + 10
+            while len(self.received[event_id]) < count and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            arrivals = self.received[event_id]
+            latencies.extend((arrival - sent) * 1000 for arrival in arrivals)
+            if len(arrivals) < count:
+                self.stdout.write(f"Event {event_id}: only {len(arrivals)}/{count} subscribers received it")
+
+        for client in clients:
+            client.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+
+        latencies.sort()
+        self.stdout.write(
+            f"Delivered {len(latencies)} events: "
+            f"p50 {statistics.median(latencies):.1f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms, "
+            f"max {latencies[-1]:.1f} ms"
+        )
+
+    async def subscribe(self, host, port, path):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n"
+            f"Authorization: Bearer {self.token}\r\n\r\n".encode()
+        )
+        await writer.drain()
+        try:
+            status = await reader.readline()
+            if b' 200 ' not in status:
+                raise CommandError(f"Subscriber got {status.decode().strip()}")
+            while True:
+                # Body lines interleave with chunked-encoding size lines;
+                # only the SSE fields matter here.
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b'retry:'):
+                    self.connected += 1
+                elif line.startswith(b'data:'):
+                    event = json.loads(line[5:])
+                    arrivals = self.received.get(event.get('id'))
+                    if arrivals is not None:
+                        arrivals.append(time.perf_counter())
+        finally:
+            writer.close()
@@ -0,0 +1,96 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server (e.g. gunicorn with sync workers, then with "
+        "ASYNC_API_VIEWS=true and uvicorn workers) with N concurrent keep-alive "
+        "clients and report latency percentiles and throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/tasks/?page_size=20')
+        parser.add_argument('--username', required=True, help="Existing user in the Secret group.")
+        parser.add_argument('--clients', type=int, nargs='+', default=[50, 200, 1000])
+        parser.add_argument('--duration', type=float, default=15, help="Seconds per run.")
+        parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.url = urlsplit(options['url'])
+        self.timeout = options['timeout']
+        for clients in options['clients']:
+            asyncio.run(self.run(clients, options['duration']))
+
+    async def run(self, clients, duration):
+        self.latencies = []
+        self.errors = 0
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(self.client(deadline) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(self.latencies)
+        if not latencies:
+            self.stdout.write(f"{clients:>5} clients  no successful requests, {self.errors} errors")
+            return
+        self.stdout.write(
+            f"{clients:>5} clients  {len(latencies) / elapsed:7.1f} req/s  "
+            f"p50 {statistics.median(latencies):8.1f} ms  "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1]:8.1f} ms  "
+            f"errors {self.errors}"
+        )
+
+    async def client(self, deadline):
+        host, port = self.url.hostname, self.url.port or 80
+        target = self.url.path + (f'?{self.url.query}' if self.url.query else '')
+        request = (
+            f"GET {target} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {self.token}\r\n"
+            f"Accept: application/json\r\n\r\n"
+        ).encode()
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(self.read_response(reader), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                self.errors += 1
+                status, keep_alive = None, False
+            else:
+                if status == 200:
+                    self.latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    self.errors += 1
+            if not keep_alive and writer is not None:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    async def read_response(self, reader):
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if headers.get('transfer-encoding') == 'chunked':
+            while (size := int(await reader.readline(), 16)):
+                await reader.readexactly(size + 2)
+            await reader.readline()
+        else:
+            await reader.readexactly(int(headers.get('content-length', 0)))
+        return status, headers.get('connection') != 'close'
@@ -0,0 +1,176 @@
+import asyncio
+import itertools
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from axes.handlers.proxy import AxesProxyHandler
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import override_settings
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from secret_data.views import AsyncTokenObtainPairView
+
+HANDLERS = {
+    'database': 'axes.handlers.database.AxesDatabaseHandler',
+    'cache': 'axes.handlers.cache.AxesCacheHandler',
+}
+PASSWORD = 'bench-login-password-1'
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test /api/token/ with each Axes handler, through the sync "
+        "TokenObtainPairView on a thread pool and AsyncTokenObtainPairView on "
+        "an event loop. Reports latency, logins/s and (async) the longest "
+        "event-loop stall, and checks every combination locks a client out "
+        "after the same failed attempts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=24, help="Logins per run, one per user.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Logins in flight at once.")
+        parser.add_argument('--handlers', nargs='+', choices=list(HANDLERS), default=list(HANDLERS))
+        parser.add_argument('--attempts', type=int, default=300, help="Attempts timed for the Axes-only cost.")
+
+    def handle(self, *args, **options):
+        # Distinct client IPs so successful runs never trip a lockout.
+        base = random.randrange(1, 200)
+        self.addresses = (f'10.{base}.{i // 250}.{i % 250 + 1}' for i in itertools.count())
+        self.used = []
+        encoded = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            [User(username=f'bench-login-{i}', password=encoded) for i in range(options['logins'])]
+        )
+        usernames = [user.username for user in users]
+        lockouts = {}
+        try:
+            for handler in options['handlers']:
+                with override_settings(AXES_HANDLER=HANDLERS[handler]):
+                    AxesProxyHandler.implementation = None
+                    check, failure = self.axes_cost(options['attempts'])
+                    self.stdout.write(f"axes {handler:<8} alone lockout check {check:5.2f} ms  recording a failure {failure:5.2f} ms")
+                    for mode, run in (('sync', self.run_sync), ('async', self.run_async)):
+                        latencies, elapsed, stall = run(usernames, options['concurrency'])
+                        self.stdout.write(
+                            f"axes {handler:<8} {mode:<5} p50 {statistics.median(latencies):7.1f} ms  "
+                            f"p99 {latencies[int(len(latencies) * 0.99) - 1]:7.1f} ms  "
+                            f"{len(latencies) / elapsed:5.2f} logins/s"
+                            + (f"  loop stall max {stall:5.1f} ms" if stall is not None else "")
+                        )
+                        lockouts[handler, mode] = self.lockout_sequence(mode, usernames[0])
+                    self.reset_attempts()
+        finally:
+            AxesProxyHandler.implementation = None
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        expected = lockouts[next(iter(lockouts))]
+        for (handler, mode), statuses in lockouts.items():
+            self.stdout.write(f"lockout  axes {handler:<8} {mode:<5} {' '.join(map(str, statuses))}")
+            if statuses != expected:
+                raise CommandError(f"Lockout behavior differs for {handler}/{mode}.")
+
+    def address(self):
+        address = next(self.addresses)
+        self.used.append(address)
+        return address
+
+    def reset_attempts(self):
+        for address in self.used:
+            AxesProxyHandler.reset_attempts(ip_address=address)
+        self.used = []
+
+    def axes_cost(self, count):
+        # The handler's own work per login, without the password hash.
+        check = failure = 0.0
+        for _ in range(count):
+            request = RequestFactory().post('/api/token/', REMOTE_ADDR=self.address())
+            credentials = {'username': 'bench-login-axes'}
+            start = time.perf_counter()
+            AxesProxyHandler.is_allowed(request, credentials)
+            middle = time.perf_counter()
+            AxesProxyHandler.user_login_failed(sender=None, credentials=credentials, request=request)
+            check += middle - start
+            failure += time.perf_counter() - middle
+        return check / count * 1000, failure / count * 1000
+
+    def sync_login(self, username, password, address):
+        request = RequestFactory().post(
+            '/api/token/', {'username': username, 'password': password},
+            content_type='application/json', REMOTE_ADDR=address,
+        )
+        start = time.perf_counter()
+        try:
+            response = TokenObtainPairView.as_view()(request).render()
+        finally:
+            # As request_finished would: hand the connection back.
+            connections.close_all()
+        return response.status_code, (time.perf_counter() - start) * 1000
+
+    async def async_login(self, username, password, address):
+        request = AsyncRequestFactory().post(
+            '/api/token/', {'username': username, 'password': password}, content_type='application/json',
+        )
+        request.META['REMOTE_ADDR'] = address
+        start = time.perf_counter()
+        response = await AsyncTokenObtainPairView.as_view()(request)
+        return response.status_code, (time.perf_counter() - start) * 1000
+
+    def run_sync(self, usernames, concurrency):
+        # Like gthread workers: each login holds a thread for its whole duration.
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(lambda name: self.sync_login(name, PASSWORD, self.address()), usernames))
+        return self.latencies(results), time.perf_counter() - start, None
+
+    def run_async(self, usernames, concurrency):
+        async def run():
+            slots = asyncio.Semaphore(concurrency)
+            stall = 0.0
+            done = False
+
+            async def login(name):
+                async with slots:
+                    return await self.async_login(name, PASSWORD, self.address())
+
+            async def probe():
+                # How late a 5 ms sleep wakes up: time the loop couldn't serve anyone else.
+                nonlocal stall
+                while not done:
+                    before = time.perf_counter()
+                    await asyncio.sleep(0.005)
+                    stall = max(stall, (time.perf_counter() - before - 0.005) * 1000)
+
+            prober = asyncio.create_task(probe())
+            start = time.perf_counter()
+            results = await asyncio.gather(*(login(name) for name in usernames))
+            elapsed = time.perf_counter() - start
+            done = True
+            await prober
+            return results, elapsed, stall
+
+        results, elapsed, stall = asyncio.run(run())
+        return self.latencies(results), elapsed, stall
+
+    def latencies(self, results):
+        statuses = {status for status, _ in results}
+        if statuses != {200}:
+            raise CommandError(f"Logins answered {sorted(statuses)}")
+        return sorted(latency for _, latency in results)
+
+    def lockout_sequence(self, mode, username):
+        # AXES_FAILURE_LIMIT wrong passwords, then the right one, from one client.
+        address = self.address()
+        passwords = ['wrong'] * settings.AXES_FAILURE_LIMIT + [PASSWORD]
+        if mode == 'sync':
+            return [self.sync_login(username, password, address)[0] for password in passwords]
+
+        async def run():
+            return [(await self.async_login(username, password, address))[0] for password in passwords]
+        return asyncio.run(run())
@@ -0,0 +1,131 @@
+import io
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from secret_data.middleware import SkipForAPIMixin
+
+
+def stock_middleware():
+    """settings.MIDDLEWARE with each API-skipping subclass swapped for the Django class it wraps."""
+    stock = []
+    for path in settings.MIDDLEWARE:
+        cls = import_string(path)
+        if issubclass(cls, SkipForAPIMixin):
+            base = cls.__bases__[1]
+            path = f'{base.__module__}.{base.__qualname__}'
+        stock.append(path)
+    return stock
+
+
+def environ(path, token=None):
+    path, _, query = path.partition('?')
+    env = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+    }
+    if token:
+        env['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return env
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request middleware cost with the stock session/CSRF/"
+        "messages middleware and with the API-skipping ones in "
+        "secret_data.middleware: the middleware chain alone around an empty "
+        "view, and a full API request through the WSGI handler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help="Requests per chain-only run.")
+        parser.add_argument('--api-requests', type=int, default=1000, help="Requests per full API run.")
+        parser.add_argument('--path', default='/api/tasks/?fields=id,title&page_size=10')
+
+    def handle(self, *args, **options):
+        arrangements = (('stock', stock_middleware()), ('api-skipping', list(settings.MIDDLEWARE)))
+
+        for path in ('/api/tasks/', '/api/admin/'):
+            for label, middleware in arrangements:
+                with override_settings(MIDDLEWARE=middleware):
+                    chain = self.chain_only()
+                per_request = self.time_chain(chain, path, options['requests'])
+                self.stdout.write(f"chain only  {path:<14} {label:<13} {per_request:6.1f} µs/request")
+
+        user = User.objects.create_user(username='bench-middleware-user')
+        try:
+            user.groups.add(Group.objects.get_or_create(name='Secret')[0])
+            token = str(RefreshToken.for_user(user).access_token)
+            # Cached responses would hide the view; keep the comparison on middleware.
+            with override_settings(RESPONSE_CACHE_ENABLED=False):
+                for label, middleware in arrangements:
+                    with override_settings(MIDDLEWARE=middleware):
+                        app = WSGIHandler()
+                    latencies = self.time_app(app, options['path'], token, options['api_requests'])
+                    self.stdout.write(
+                        f"full API    {options['path']:<14} {label:<13} "
+                        f"p50 {statistics.median(latencies):6.2f} ms  "
+                        f"mean {statistics.fmean(latencies):6.2f} ms"
+                    )
+        finally:
+            User.objects.filter(pk=user.pk).delete()
+
+    def chain_only(self):
+        # Load the configured middleware around an empty view instead of URL
+        # resolution, calling process_view hooks the way the handler does.
+        handler = BaseHandler()
+
+        def view(request):
+            return HttpResponse()
+
+        def get_response(request):
+            for process_view in handler._view_middleware:
+                response = process_view(request, view, (), {})
+                if response is not None:
+                    return response
+            return view(request)
+
+        handler._get_response = get_response
+        handler.load_middleware()
+        return handler._middleware_chain
+
+    def time_chain(self, chain, path, count):
+        requests = [WSGIRequest(environ(path)) for _ in range(count + 1000)]
+        for request in requests[:1000]:
+            chain(request)
+        start = time.perf_counter()
+        for request in requests[1000:]:
+            chain(request)
+        return (time.perf_counter() - start) / count * 1_000_000
+
+    def time_app(self, app, path, token, count):
+        latencies = []
+        for i in range(count + 50):
+            statuses = []
+            start = time.perf_counter()
+            response = app(environ(path, token), lambda status, headers: statuses.append(status))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            if not statuses[0].startswith('200'):
+                raise CommandError(f"{path} answered {statuses[0]}")
+            if i >= 50:
+                latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
@@ -0,0 +1,58 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from secret_data.models import SecretLevelData
+from secret_data.search import text_search, trigram_enabled
+from secret_data.fields import encrypt_many
+from tasks.models import Task
+
+VOCABULARY = [f'{prefix}{n}' for prefix in ('alpha', 'bravo', 'delta', 'kilo', 'tango') for n in range(5000)]
+
+
+class Command(BaseCommand):
+    help = "Time a first page of ?q= results on task titles and secret messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"pg_trgm {'enabled' if trigram_enabled() else 'not installed; unindexed fallback'}")
+        # Everything runs in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            self.run(options['rows'], options['page_size'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def run(self, rows, page_size, repeat):
+        rng = random.Random(0)
+        description = encrypt_many(['Benchmark task.'])[0]
+        seeded = 0
+        for count in sorted(rows):
+            titles = [' '.join(rng.choices(VOCABULARY, k=4)) for _ in range(seeded, count)]
+            Task.objects.bulk_create([Task(title=title, description=description) for title in titles], batch_size=5000)
+            SecretLevelData.objects.bulk_create([SecretLevelData(message=title) for title in titles], batch_size=5000)
+            seeded = count
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE tasks_task, secret_data_secretleveldata')
+
+            # 'kilo123' (with kilo1230-kilo1239) is in about 0.2% of rows, 'kilo12' in about 2%.
+            for query in ('kilo123', 'kilo12'):
+                for label, queryset, field in (
+                    ('task titles', Task.objects.only('id', 'title'), 'title'),
+                    ('secret messages', SecretLevelData.objects.all(), 'message'),
+                ):
+                    timings = []
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        page = list(text_search(queryset, field, query)[:page_size + 1])
+                        timings.append((time.perf_counter() - start) * 1000)
+                    timings.sort()
+                    self.stdout.write(
+                        f"{count:>8} rows  {label:<16} q={query:<8} {len(page):>3} on page  "
+                        f"p50 {statistics.median(timings):7.1f} ms  max {timings[-1]:7.1f} ms"
+                    )
@@ -0,0 +1,104 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+PROFILES = {
+    'default': {'GUNICORN_PRELOAD': 'false'},
+    'preload': {'GUNICORN_PRELOAD': 'true'},
+    'preload-gthread': {'GUNICORN_PRELOAD': 'true', 'GUNICORN_WORKER_CLASS': 'gthread'},
+}
+
+
+def memory_kib(pid):
+    """RSS, PSS and USS (private pages) of a process, from smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as listing:
+        return [int(child) for child in listing.read().split()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn with each worker profile (gunicorn.conf.py), warm the "
+        "workers up with API requests, and report per-worker RSS, PSS and USS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="Existing user in the Secret group.")
+        parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=400, help="Warm-up requests per profile.")
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        for profile in options['profiles']:
+            env = {
+                **os.environ,
+                **PROFILES[profile],
+                'GUNICORN_WORKERS': str(options['workers']),
+                'GUNICORN_MAX_REQUESTS': '0',
+            }
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                 '--bind', f"127.0.0.1:{options['port']}", '--access-logfile', '/dev/null'],
+                cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                started = time.perf_counter()
+                self.wait_until_ready(options['port'])
+                ready = time.perf_counter() - started
+                self.warm_up(options['port'], token, options['requests'])
+                workers = [memory_kib(pid) for pid in children(server.pid)]
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+
+            rss, pss, uss = (sum(values) / len(workers) / 1024 for values in zip(*workers))
+            self.stdout.write(
+                f"{profile:<16} {len(workers)} workers  ready in {ready:4.1f}s  per worker: "
+                f"RSS {rss:6.1f} MiB  PSS {pss:6.1f} MiB  USS {uss:6.1f} MiB"
+            )
+
+    def wait_until_ready(self, port):
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/api/tasks/', timeout=5)
+            except urllib.error.HTTPError:
+                return
+            except OSError:
+                time.sleep(0.2)
+                continue
+            return
+        raise CommandError("gunicorn did not start.")
+
+    def warm_up(self, port, token, count):
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{port}/api/tasks/?page_size=20',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        for _ in range(count):
+            urllib.request.urlopen(request, timeout=30).read()
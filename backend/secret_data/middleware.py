@@ -0,0 +1,48 @@
+"""
+Session, CSRF, auth and messages middleware that step aside for the JWT API.
+
+Requests under settings.API_ROUTE_PREFIXES authenticate with a bearer token
+and never read a session, a CSRF cookie or a flash message, so these
+subclasses hand them straight to the next layer. Everything else,
+including /api/admin/, runs the stock middleware unchanged.
+"""
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import csrf
+
+
+def is_api_request(request):
+    return request.path_info.startswith(settings.API_ROUTE_PREFIXES)
+
+
+class SkipForAPIMixin:
+    def __call__(self, request):
+        # In async mode get_response returns a coroutine, which the handler
+        # awaits just as it would the stock middleware's.
+        if is_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipForAPIMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipForAPIMixin, csrf.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # The handler calls process_view directly, outside __call__.
+        if is_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(SkipForAPIMixin, auth.AuthenticationMiddleware):
+    # request.user comes from the session; the API's authentication classes
+    # set it from the token instead.
+    pass
+
+
+class MessageMiddleware(SkipForAPIMixin, messages.MessageMiddleware):
+    pass
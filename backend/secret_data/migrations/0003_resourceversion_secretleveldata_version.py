@@ -0,0 +1,32 @@
+# Generated by Django 6.1.2 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+def create_collection_versions(apps, schema_editor):
+    ResourceVersion = apps.get_model('secret_data', 'ResourceVersion')
+    for name in ('tasks.task', 'secret_data.secretleveldata'):
+        ResourceVersion.objects.get_or_create(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secret_data', '0002_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='secretleveldata',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(create_collection_versions, migrations.RunPython.noop),
+    ]
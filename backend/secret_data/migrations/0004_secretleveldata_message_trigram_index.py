@@ -0,0 +1,18 @@
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+from secret_data.search import trigram_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secret_data', '0003_resourceversion_secretleveldata_version'),
+    ]
+
+    operations = [
+        trigram_index(
+            'secret_data', 'secretleveldata',
+            django.contrib.postgres.indexes.GinIndex(fields=['message'], name='secretdata_message_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secret_data', '0004_secretleveldata_message_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthChange',
+            fields=[
+                ('user_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('changed_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -1,9 +1,67 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 # Create your models here.
-class SecretLevelData(models.Model):
+class VersionedModel(models.Model):
+    # Increases on every save; together with ResourceVersion it backs the
+    # ETags on the list and detail endpoints (see secret_data/versioning.py).
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # Increment in SQL so concurrent saves from different workers can't
+        # both end up with the same version. Django reads the new value back
+        # through the UPDATE's RETURNING clause, so no extra SELECT is needed.
+        self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        return super().save(*args, **kwargs)
+
+
+class ResourceVersion(models.Model):
+    # One row per collection (model label), bumped whenever any row changes.
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
+class SecretLevelData(VersionedModel):
     message = models.TextField()
 
 
     class Meta:
         verbose_name_plural = "Secret Level Data"
+        indexes = [
+            # Supervisor ?q= search (secret_data/search.py).
+            GinIndex(fields=['message'], name='secretdata_message_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+
+class RevokedToken(models.Model):
+    # JWT ID of a revoked access or refresh token. Rows are only needed until
+    # the token would have expired anyway; see purge_revoked_tokens.
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class AuthChange(models.Model):
+    # When a user's account or group membership last changed. Each worker
+    # polls this table to drop its cached authentications and group names;
+    # see secret_data.authentication.AuthChanges.
+    user_id = models.BigIntegerField(primary_key=True)
+    changed_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.changed_at}"
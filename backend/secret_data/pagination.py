@@ -0,0 +1,200 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, _positive_int, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Opaque-cursor pagination for the list endpoints.
+
+    The existing frontend (TaskList.jsx / SecretList.jsx) expects a bare JSON
+    list, so unless API_PAGINATE_LISTS is on we only paginate requests that
+    opt in with ?page_size= or ?cursor=. Returning None from get_page_size()
+    tells paginate_queryset() to skip pagination.
+
+    CursorPagination seeks on the first ordering field only and steps over
+    ties with an OFFSET, which runs into offset_cutoff when many rows share a
+    timestamp (e.g. after a bulk complete). Here a cursor position holds
+    every ordering field, so pages seek on the whole key. Orderings must use
+    one direction throughout and end in a unique field. Nullable fields sort
+    their NULLs as the highest values, as PostgreSQL indexes do by default.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_page_size(self, request):
+        params = request.query_params
+        if not (settings.API_PAGINATE_LISTS
+                or self.cursor_query_param in params
+                or self.page_size_query_param in params):
+            return None
+        return super().get_page_size(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*self._order_by(queryset.model, ordering))
+        if current_position is not None:
+            queryset = self.seek(queryset, current_position, reverse)
+
+        # Positions are unique, so the offset is only ever non-zero in a
+        # final-page cursor from get_previous_link().
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def seek(self, queryset, position, reverse):
+        """Rows after position in the direction being read, as a range on the leading field plus tie-breaks."""
+        names = [name.lstrip('-') for name in self.ordering]
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(names):
+                raise ValueError
+            fields = [queryset.model._meta.get_field(name) for name in names]
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+            if any(value is None and not field.null for field, value in zip(fields, values)):
+                raise ValueError
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        lookup = 'lt' if self.ordering[0].startswith('-') != reverse else 'gt'
+        after = self._beyond(fields[-1], lookup, values[-1])
+        for field, value in zip(reversed(fields[:-1]), reversed(values[:-1])):
+            same = Q(**{f'{field.name}__isnull': True} if value is None else {field.name: value}) & after
+            beyond = self._beyond(field, lookup, value)
+            after = same if beyond is None else beyond | same
+        # The inclusive bound on the leading field is what the index scan starts from.
+        if values[0] is not None:
+            queryset = queryset.filter(self._beyond(fields[0], f'{lookup}e', values[0]))
+        elif lookup == 'gt':
+            queryset = queryset.filter(**{f'{names[0]}__isnull': True})
+        return queryset.filter(after)
+
+    @staticmethod
+    def _beyond(field, lookup, value):
+        """Rows whose field is past value in the direction of lookup, NULLs being highest; None if there are none."""
+        if value is None:
+            return Q(**{f'{field.name}__isnull': False}) if lookup == 'lt' else None
+        beyond = Q(**{f'{field.name}__{lookup}': value})
+        if field.null and lookup.startswith('gt'):
+            beyond |= Q(**{f'{field.name}__isnull': True})
+        return beyond
+
+    @staticmethod
+    def _order_by(model, ordering):
+        # Spell out where NULLs go so the order matches _beyond() on any backend.
+        expressions = []
+        for name in ordering:
+            field = model._meta.get_field(name.lstrip('-'))
+            if not field.null:
+                expressions.append(name)
+            elif name.startswith('-'):
+                expressions.append(F(field.name).desc(nulls_first=True))
+            else:
+                expressions.append(F(field.name).asc(nulls_last=True))
+        return expressions
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [name.lstrip('-') for name in ordering]
+        if isinstance(instance, dict):
+            values = [instance[name] for name in names]
+        else:
+            values = [getattr(instance, name) for name in names]
+        return json.dumps(
+            [value if value is None or isinstance(value, int) else str(value) for value in values],
+            separators=(',', ':'),
+        )
+
+
+class TaskCursorPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class SecretCursorPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class CompletedTaskCursorPagination(KeysetPagination):
+    # Always paginated: a heavy user's history is the case it exists for.
+    ordering = ('-date_completed', '-id')
+
+    def get_page_size(self, request):
+        return CursorPagination.get_page_size(self, request)
+
+
+class SearchPagination(BasePagination):
+    """
+    Page-numbered pagination for relevance-ordered ?q= results, which have no
+    stable keyset to put in a cursor. Always paginated. One extra row is read
+    to tell whether there is a next page instead of counting every match.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    page_query_param = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page_size = _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            pass
+        try:
+            self.page = _positive_int(request.query_params.get(self.page_query_param, 1), strict=True)
+        except ValueError:
+            raise NotFound('Invalid page.')
+
+        start = (self.page - 1) * self.page_size
+        rows = list(queryset[start:start + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_paginated_response(self, data):
+        url = self.request.build_absolute_uri()
+        next_url = replace_query_param(url, self.page_query_param, self.page + 1) if self.has_next else None
+        if self.page == 1:
+            previous_url = None
+        elif self.page == 2:
+            previous_url = remove_query_param(url, self.page_query_param)
+        else:
+            previous_url = replace_query_param(url, self.page_query_param, self.page - 1)
+        return Response({'next': next_url, 'previous': previous_url, 'results': data})
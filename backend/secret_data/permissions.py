@@ -1,13 +1,49 @@
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 
+from .authentication import auth_changes
+from .fields import DecryptionCache
+
+# Per-worker LRU of user id -> (AuthChanges stamp, group names).
+group_cache = DecryptionCache(settings.GROUP_CACHE_SIZE)
+
+
+def get_group_names(user):
+    """
+    Return the set of group names for user.
+
+    Resolved once per request (memoized on the request's user object) and kept
+    in this worker's group_cache between requests. secret_data.signals stamps
+    the user in AuthChange whenever their groups or a group they belong to
+    change. Each request reads that one row and only trusts an entry loaded
+    under the same stamp, so a removal applies in every worker at once.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    names = getattr(user, '_group_names', None)
+    if names is None:
+        # Read before the groups so a concurrent change can't be cached
+        # under the new stamp.
+        stamp = auth_changes.read(user.pk)
+        entry = group_cache.get(user.pk)
+        if entry is not None and entry[0] == stamp:
+            names = entry[1]
+        else:
+            names = frozenset(user.groups.values_list('name', flat=True))
+            group_cache.set(user.pk, (stamp, names))
+        user._group_names = names
+    return names
+
+
 # TODO, create patch endpoints for users with Secret permission so they can update if tasks have been completed.
 # Update model to account for when task was complete and who completed it.
 class IsInSecretGroup(BasePermission):
     def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name='Secret').exists()
+        return request.user and 'Secret' in get_group_names(request.user)
 
 
 # TODO, add view specifically for endpoints for supervisors. Only supervisors can post secret messages and add tasks
 class IsInSupervisorGroup(BasePermission):
     def has_permission(self,request, view):
-        return request.user and request.user.groups.filter(name='Supervisor').exists()
+        return request.user and 'Supervisor' in get_group_names(request.user)
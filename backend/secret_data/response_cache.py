@@ -0,0 +1,45 @@
+import functools
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from .versioning import query_digest, request_version
+
+
+def cache_list_response(model):
+    """
+    Cache the rendered JSON of a list GET handler in the 'responses' cache.
+
+    The key includes the collection version, so any write to the model (which
+    bumps the version through signals) makes earlier entries unreachable and
+    they age out of the LRU. Only successful, non-streaming JSON responses no
+    larger than RESPONSE_CACHE_MAX_ENTRY_BYTES are stored.
+    """
+    label = model._meta.label_lower
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED or request.accepted_renderer.format != 'json':
+                return handler(view, request, *args, **kwargs)
+
+            response_cache = caches['responses']
+            key = f'{label}:{request_version(request, label)}:{request.get_host()}{request.path}:{query_digest(request)}'
+            cached = response_cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                def store(rendered):
+                    if len(rendered.content) <= settings.RESPONSE_CACHE_MAX_ENTRY_BYTES:
+                        response_cache.set(key, (rendered.content, rendered['Content-Type']))
+
+                response.add_post_render_callback(store)
+            return response
+
+        return wrapper
+
+    return decorator
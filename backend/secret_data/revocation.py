@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing of one BLAKE2b digest."""
+
+    def __init__(self, size, hashes):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Per-worker view of RevokedToken.
+
+    A Bloom filter answers "definitely not revoked" without touching the
+    database, which is the case for nearly every request. Only filter hits are
+    confirmed with a query. Every TOKEN_REVOCATION_SYNC_INTERVAL seconds the
+    worker pulls rows revoked since its last sync, and the filter is rebuilt
+    from unexpired rows once per access token lifetime so expired entries drop
+    out. Tokens revoked by another worker are therefore rejected here within
+    one sync interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._watermark = None
+
+    def _new_filter(self):
+        return BloomFilter(settings.TOKEN_REVOCATION_BLOOM_BITS, settings.TOKEN_REVOCATION_BLOOM_HASHES)
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._synced_at < settings.TOKEN_REVOCATION_SYNC_INTERVAL:
+            return
+
+        with self._lock:
+            rebuild_interval = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+            if force or self._filter is None or now - self._built_at >= rebuild_interval:
+                bloom = self._new_filter()
+                rows = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+                self._built_at = now
+            else:
+                # Overlap by one interval so rows committed late by a slow
+                # transaction are still picked up; re-adding is harmless.
+                overlap = timedelta(seconds=settings.TOKEN_REVOCATION_SYNC_INTERVAL)
+                bloom = self._filter
+                rows = RevokedToken.objects.filter(revoked_at__gte=self._watermark - overlap)
+
+            for jti, revoked_at in rows.values_list('jti', 'revoked_at'):
+                bloom.add(jti)
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+
+            if self._watermark is None:
+                self._watermark = timezone.now()
+            self._filter = bloom
+            self._synced_at = now
+
+    def add(self, jti):
+        # Make a revocation visible in this worker immediately.
+        self.sync()
+        self._filter.add(jti)
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revocation_list = RevocationList()
+
+
+def revoke_token(token):
+    """Persist the revocation of a validated simplejwt token and add it to this worker's filter."""
+    jti = token['jti']
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+    revocation_list.add(jti)
@@ -0,0 +1,109 @@
+"""
+?q= substring search for the supervisor list endpoints.
+
+Where the server provides pg_trgm, Task.title and SecretLevelData.message
+carry GIN trigram indexes (see their Meta.indexes and trigram_index()),
+which serve the case-insensitive substring filter, and results are ranked
+by trigram similarity. Without the extension (e.g. a test database) the
+same filter runs as a plain scan and results are ranked exact match, then
+prefix match, then anything else. Either way ties follow the list's
+?ordering=.
+"""
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection, migrations
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.lookups import IContains
+from rest_framework import serializers
+
+# Shorter queries have no trigram to look up, so the index can't serve them.
+SEARCH_MIN_LENGTH = 3
+SEARCH_MAX_LENGTH = 200
+
+
+def trigram_enabled():
+    if connection.vendor != 'postgresql':
+        return False
+    enabled = getattr(connection, '_pg_trgm_enabled', None)
+    if enabled is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            enabled = connection._pg_trgm_enabled = cursor.fetchone() is not None
+    return enabled
+
+
+def trigram_index(app_label, model_name, index):
+    """
+    Migration operation for a gin_trgm_ops index declared in Meta.indexes.
+
+    The index always goes into the migration state, but into the database
+    only where the server provides pg_trgm, installing the extension first if
+    needed (it is trusted from PostgreSQL 13, so the database owner may). On
+    older servers a superuser has to create it beforehand.
+    """
+    def create(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                return
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                cursor.execute('CREATE EXTENSION pg_trgm')
+        schema_editor.add_index(apps.get_model(app_label, model_name), index)
+        connection.__dict__.pop('_pg_trgm_enabled', None)
+
+    def drop(apps, schema_editor):
+        # The extension stays: other indexes may use it.
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(index.name)}')
+
+    return migrations.SeparateDatabaseAndState(
+        state_operations=[migrations.AddIndex(model_name=model_name, index=index)],
+        database_operations=[migrations.RunPython(create, drop)],
+    )
+
+
+def search_query(request):
+    """The stripped ?q= value, or None when the parameter is absent."""
+    if 'q' not in request.query_params:
+        return None
+    query = request.query_params['q'].strip()
+    if not SEARCH_MIN_LENGTH <= len(query) <= SEARCH_MAX_LENGTH:
+        raise serializers.ValidationError({
+            'q': [f'Enter between {SEARCH_MIN_LENGTH} and {SEARCH_MAX_LENGTH} characters.'],
+        })
+    return query
+
+
+class ILikeContains(IContains):
+    """
+    icontains written as column ILIKE '%query%' on PostgreSQL. The trigram
+    indexes are on the bare column and serve ILIKE, but not the
+    UPPER(column::text) LIKE UPPER(...) that Django generates for icontains.
+    """
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = compiler.compile(self.lhs)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs_sql} ILIKE {rhs_sql}', (*lhs_params, *rhs_params)
+
+
+def text_search(queryset, field, query, ordering=('id',)):
+    """
+    Rows of queryset whose field contains query, most relevant first and
+    then by ordering, which must end in a unique field.
+    """
+    queryset = queryset.filter(ILikeContains(F(field), query))
+    if trigram_enabled():
+        rank = TrigramSimilarity(field, query)
+    else:
+        rank = Case(
+            When(**{f'{field}__iexact': query}, then=Value(1.0)),
+            When(**{f'{field}__istartswith': query}, then=Value(0.5)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', *ordering)
+
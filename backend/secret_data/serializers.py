@@ -1,8 +1,17 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import SecretLevelData
+from .timing import TimedSerializerMixin
 
-class SecretLevelDataSerializer(serializers.ModelSerializer):
+class SecretLevelDataListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    def create(self, validated_data):
+        secrets = [SecretLevelData(**item) for item in validated_data]
+        return SecretLevelData.objects.bulk_create(secrets, batch_size=settings.BULK_BATCH_SIZE)
+
+
+class SecretLevelDataSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = SecretLevelData
         fields = ['id', 'message']
+        list_serializer_class = SecretLevelDataListSerializer
 
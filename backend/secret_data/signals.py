@@ -0,0 +1,81 @@
+from django.apps import apps
+from django.contrib.auth.models import Group, User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .authentication import record_auth_change
+from .events import publish_change
+from .models import VersionedModel
+from .timing import time_queries
+from .versioning import bump_version, version_bumps_suppressed
+
+
+def invalidate_user_groups(user_ids):
+    # Stamped in the change's transaction; cached group names are dropped
+    # once it commits, so a reader in between can't outlive the invalidation.
+    record_auth_change(user_ids)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add/remove/clear(): instance is the user.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_user_groups([instance.pk])
+    elif action == 'pre_clear':
+        # group.user_set.clear(): pk_set is not provided, so collect members first.
+        invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        # group.user_set.add/remove(): pk_set holds the affected users.
+        invalidate_user_groups(pk_set)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        # A rename changes the name every member's permission check looks for.
+        invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Covers deactivation and password changes; cached authentications for
+    # this user stop matching in every worker. A new user has nothing cached
+    # yet, and logins only touch last_login, which the snapshot doesn't hold.
+    if not created and update_fields != frozenset({'last_login'}):
+        record_auth_change([instance.pk])
+
+
+def versioned_model_changed(sender, instance, signal, created=False, **kwargs):
+    # Bumps the collection version used in list ETags for Task and SecretLevelData
+    # and announces the change to /api/events/ subscribers.
+    if not version_bumps_suppressed():
+        label = sender._meta.label_lower
+        bump_version(label)
+        if signal is post_delete:
+            action = 'deleted'
+        else:
+            action = 'created' if created else 'updated'
+        publish_change(label, action, instance.pk)
+
+
+# Connected per model rather than for every sender so unrelated models keep
+# Django's fast-delete path.
+for model in apps.get_models():
+    if issubclass(model, VersionedModel):
+        post_save.connect(versioned_model_changed, sender=model)
+        post_delete.connect(versioned_model_changed, sender=model)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    # Fires again each time a pooled connection is checked out.
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
@@ -0,0 +1,48 @@
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+
+def queryset_batches(queryset, size):
+    """
+    Yield lists of up to size rows, read through a server-side cursor
+    (iterator(chunk_size=...)) so at most one batch is held at a time.
+    """
+    batch = []
+    for obj in queryset.iterator(chunk_size=size):
+        batch.append(obj)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def streaming_json_response(batches, serializer, prepare=None):
+    """
+    Stream a JSON array of serializer.to_representation() for every object in
+    batches, formatted like JSONRenderer's output. prepare(batch), if given,
+    runs before a batch is serialized (e.g. to batch-decrypt it). Each batch
+    is written as one chunk, so memory stays bounded by the batch size rather
+    than the table size.
+
+    Errors raised while streaming can't change the status code any more; the
+    response is cut short and the client sees truncated JSON.
+    """
+    encoder = encoders.JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    )
+
+    def content():
+        yield '['
+        separator = ''
+        for batch in batches:
+            if prepare is not None:
+                prepare(batch)
+            yield separator + ','.join(encoder.encode(serializer.to_representation(obj)) for obj in batch)
+            separator = ','
+        yield ']'
+
+    return StreamingHttpResponse(content(), content_type='application/json')
@@ -1,13 +1,30 @@
-from rest_framework.test import APITestCase, APIClient, URLPatternsTestCase
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory, URLPatternsTestCase
 from rest_framework import status
 from django.contrib.auth.models import User, Group, Permission
+from django.core.cache import caches
 from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse, include, path
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import SecretLevelData
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from .models import AuthChange, SecretLevelData, RevokedToken
+from .revocation import BloomFilter, revoke_token
+from .permissions import get_group_names
+from .authentication import SNAPSHOT_FIELDS, auth_cache, auth_changes, RevocableJWTAuthentication
+from .events import RESYNC, Subscription, broker
+from .views import ChangeStreamView, AsyncSecretLevelView, AsyncSecretDetail, AsyncTokenObtainPairView
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+import json
+import time
 
 class SecretDataTest(APITestCase):   
     def setUp(self):
+        # Versions roll back with each test's transaction, so cached responses would be reused.
+        caches['responses'].clear()
+
         self.regular_user = User.objects.create_user(
             username='regular_user',
             email='regular@test.com',
@@ -161,6 +178,72 @@ class SecretDataTest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_supervisor_search_secret_list(self):
+        client = APIClient()
+        url = reverse('secret-supervisor-list')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+        exact = SecretLevelData.objects.create(message="secret")
+        SecretLevelData.objects.create(message="Unrelated")
+
+        first_page = client.get(url, {'q': 'SECRET', 'page_size': 2}, headers={'Authorization': f'Bearer {access}'})
+        second_page = client.get(first_page.data['next'], headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(first_page.data['results'][0]['id'], exact.id)
+        self.assertIsNone(first_page.data['previous'])
+        self.assertIsNone(second_page.data['next'])
+        self.assertEqual(
+            {item['id'] for item in first_page.data['results'] + second_page.data['results']},
+            {exact.id, self.secret_data_1.id, self.secret_data_2.id},
+        )
+
+        response = client.get(url, {'q': ' s '}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_secret_views_match_sync_views(self):
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.secret_user).access_token}'}
+        factory = AsyncRequestFactory()
+
+        for params in ({}, {'page_size': 1}):
+            response = await AsyncSecretLevelView.as_view()(factory.get('/api/secret/', params, headers=headers))
+            expected = await sync_to_async(self.client.get)(reverse('secret-level'), params, headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.content, expected.content)
+
+        response = await AsyncSecretDetail.as_view()(factory.get('/api/secret/1/', headers=headers), pk=self.secret_data_1.id)
+        self.assertEqual(json.loads(response.content), {'id': self.secret_data_1.id, 'message': 'Top Secret Message 1'})
+        response = await AsyncSecretDetail.as_view()(factory.get('/api/secret/0/', headers=headers), pk=0)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_token_view_matches_sync_view_and_locks_out(self):
+        factory = AsyncRequestFactory()
+        view = AsyncTokenObtainPairView.as_view()
+
+        def login(data, remote_addr):
+            request = factory.post('/api/token/', data, content_type='application/json')
+            request.META['REMOTE_ADDR'] = remote_addr
+            return request
+
+        # Three failures lock the client's IP out (AXES_FAILURE_LIMIT), after
+        # which the right password is refused too.
+        attempts = [{'username': 'secret_user', 'password': password} for password in ['wrong'] * 3 + ['testpassword123']]
+        sync_responses = [
+            await sync_to_async(self.client.post)(reverse('token_obtain_pair'), data, REMOTE_ADDR='10.0.0.1')
+            for data in attempts
+        ]
+        async_responses = [await view(login(data, '10.0.0.2')) for data in attempts]
+
+        self.assertEqual([r.status_code for r in async_responses], [status.HTTP_401_UNAUTHORIZED] * 4)
+        self.assertEqual([r.content for r in async_responses], [r.content for r in sync_responses])
+        self.assertEqual(async_responses[0]['WWW-Authenticate'], 'Bearer realm="api"')
+
+        response = await view(login({'username': 'secret_user', 'password': 'testpassword123'}, '10.0.0.3'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(json.loads(response.content)), {'access', 'refresh'})
+
+        response = await view(login({'username': 'secret_user'}, '10.0.0.3'))
+        self.assertEqual(json.loads(response.content), {'password': ['This field is required.']})
+
     def test_supervisor_get_secret_list_unauthorized_not_in_group(self):
         client = APIClient()
         url = reverse('secret-supervisor-list')
@@ -306,4 +389,554 @@ class SecretDataTest(APITestCase):
         )
 
         self.assertEqual(input_response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(input_response.data['message'], output_response.data['message'])
\ No newline at end of file
+        self.assertEqual(input_response.data['message'], output_response.data['message'])
+
+    def test_user_get_secret_list_paginated(self):
+        client = APIClient()
+        url = reverse('secret-level')
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        first_page = client.get(
+            url,
+            {'page_size': 1},
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        second_page = client.get(
+            first_page.data['next'],
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(first_page.data['results'][0]['id'], self.secret_data_1.id)
+        self.assertEqual(second_page.data['results'][0]['id'], self.secret_data_2.id)
+        self.assertIsNone(second_page.data['next'])
+
+
+    def test_secret_view_after_removed_from_group_with_cached_groups(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.secret_user)
+        url = reverse('secret-level')
+
+        # The first request caches the user's groups.
+        first_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.secret_user.groups.remove(self.secret_group)
+
+        second_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(first_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_secret_view_after_group_renamed(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.secret_user)
+        url = reverse('secret-level')
+
+        client.get(
+            url,
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.secret_group.name = 'Former Secret'
+            self.secret_group.save()
+
+        response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(AUTH_CHANGE_SYNC_INTERVAL=60)
+    def test_group_removal_applies_before_next_sync(self):
+        get_group_names(self.secret_user)
+        auth_changes.sync(force=True)
+
+        # As if removed through another worker: this one's AuthChanges never
+        # hears of it and won't sync for another minute.
+        with self.captureOnCommitCallbacks(execute=False):
+            self.secret_user.groups.remove(self.secret_group)
+
+        self.assertEqual(get_group_names(User.objects.get(pk=self.secret_user.pk)), frozenset())
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=60, AUTH_CHANGE_SYNC_INTERVAL=60)
+    def test_cached_groups_skip_group_query(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        url = reverse('user-permissions')
+
+        client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        # Only the user's AuthChange row is read. The default cache is a
+        # DatabaseCache here as in production, so a cache read on the
+        # request path would be counted too.
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                url,
+                headers={'Authorization': f'Bearer {access}'},
+                format='json'
+            )
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"secret_data_authchange"', queries[0]['sql'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_secret'])
+        self.assertFalse(response.data['is_supervisor'])
+
+
+    def test_revoked_access_token_is_rejected(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.secret_user)
+        access = refresh.access_token
+
+        revoke_response = client.post(
+            reverse('token_revoke'),
+            headers={'Authorization': f'Bearer {access}'},
+            data={'refresh': str(refresh)},
+            format='json'
+        )
+
+        secret_response = client.get(
+            reverse('secret-level'),
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        refresh_response = client.post(
+            reverse('token_refresh'),
+            data={'refresh': str(refresh)},
+            format='json'
+        )
+
+        self.assertEqual(revoke_response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+        self.assertEqual(secret_response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(refresh_response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_tokens_still_valid_after_revoke(self):
+        client = APIClient()
+        revoked = RefreshToken.for_user(self.secret_user).access_token
+        other = RefreshToken.for_user(self.secret_user).access_token
+
+        client.post(
+            reverse('token_revoke'),
+            headers={'Authorization': f'Bearer {revoked}'},
+            format='json'
+        )
+
+        response = client.get(
+            reverse('secret-level'),
+            headers={'Authorization': f'Bearer {other}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revoke_refresh_token_of_other_user(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        other_refresh = RefreshToken.for_user(self.supervisor_user)
+
+        response = client.post(
+            reverse('token_revoke'),
+            headers={'Authorization': f'Bearer {access}'},
+            data={'refresh': str(other_refresh)},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(RevokedToken.objects.count(), 0)
+
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=60, AUTH_CHANGE_SYNC_INTERVAL=60)
+    def test_cached_authentication_skips_user_query(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        url = reverse('secret-level')
+        auth_cache.clear()
+
+        client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        # Only the group check's AuthChange read and the collection version
+        # read are left; the response comes from the response cache.
+        with self.assertNumQueries(2):
+            response = client.get(
+                url,
+                headers={'Authorization': f'Bearer {access}'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(auth_cache.stats()['hits'], 1)
+        self.assertEqual(auth_cache.stats()['misses'], 1)
+
+    def test_cached_authentication_restores_user_fields(self):
+        self.secret_user.first_name = 'Secret'
+        self.secret_user.is_staff = True
+        self.secret_user.save()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        request = APIRequestFactory().get('/api/secret/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        auth_cache.clear()
+
+        loaded, _ = RevocableJWTAuthentication().authenticate(request)
+        user, _ = RevocableJWTAuthentication().authenticate(request)
+
+        self.assertEqual(auth_cache.stats()['hits'], 1)
+        self.assertEqual(user.pk, self.secret_user.pk)
+        self.assertEqual(user.username, 'secret_user')
+        self.assertEqual(user.email, 'secret@test.com')
+        self.assertTrue(user.is_active)
+        self.assertTrue(user.is_staff)
+        self.assertFalse(user.is_superuser)
+        self.assertFalse(user._state.adding)
+        for field in SNAPSHOT_FIELDS:
+            self.assertEqual(getattr(user, field), getattr(loaded, field), field)
+
+    def test_cached_authentication_after_user_deactivated(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        url = reverse('secret-level')
+
+        first_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.secret_user.is_active = False
+            self.secret_user.save()
+
+        second_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        self.assertEqual(first_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_authentication_after_change_in_other_worker(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        url = reverse('secret-level')
+
+        first_response = client.get(url, headers={'Authorization': f'Bearer {access}'})
+
+        # Another worker's change: the row is written, but this worker only
+        # learns about it from its next sync.
+        User.objects.filter(pk=self.secret_user.pk).update(is_active=False)
+        AuthChange.objects.update_or_create(user_id=self.secret_user.pk, defaults={'changed_at': timezone.now()})
+        auth_changes.sync(force=True)
+
+        second_response = client.get(url, headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(first_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_supervisor_get_metrics(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.supervisor_user)
+
+        response = client.get(
+            reverse('metrics'),
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('auth_cache', response.data)
+        self.assertIn('decryption_cache', response.data)
+
+    def test_supervisor_get_metrics_reports_db_pool(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.supervisor_user)
+
+        response = client.get(
+            reverse('metrics'),
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        pool = connection.settings_dict['OPTIONS'].get('pool')
+        if not pool:
+            self.assertIsNone(response.data['db_pool'])
+            return
+        self.assertEqual(response.data['db_pool']['pool_max'], pool['max_size'])
+        # This request's own connection is checked out.
+        self.assertGreaterEqual(response.data['db_pool']['in_use'], 1)
+        self.assertGreater(response.data['db_pool']['saturation'], 0)
+
+    def test_user_get_metrics_unauthorized(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        response = client.get(
+            reverse('metrics'),
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+    def test_supervisor_get_secret_list_not_modified(self):
+        client = APIClient()
+        url = reverse('secret-supervisor-list')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        first_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        second_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}', 'If-None-Match': first_response['ETag']},
+            format='json'
+        )
+
+        client.delete(
+            reverse('secret-supervisor-detail', args=[self.secret_data_1.id]),
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        third_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}', 'If-None-Match': first_response['ETag']},
+            format='json'
+        )
+
+        self.assertEqual(second_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(third_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(third_response.data), 1)
+
+    def test_cached_list_reads_collection_version_once(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('secret-level'), headers={'Authorization': f'Bearer {access}'})
+
+        # The ETag and the response cache key share one version read.
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sum('secret_data_resourceversion' in query['sql'] for query in queries.captured_queries), 1
+        )
+
+
+    def test_supervisor_bulk_create_update_delete_secrets(self):
+        client = APIClient()
+        url = reverse('secret-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        create_response = client.post(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data=[{'message': 'bulk message 1'}, {'message': 'bulk message 2'}],
+            format='json'
+        )
+
+        update_response = client.patch(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data=[{'id': create_response.data[0]['id'], 'message': 'bulk message 1 updated'}],
+            format='json'
+        )
+
+        delete_response = client.delete(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'ids': [self.secret_data_1.id, self.secret_data_2.id]},
+            format='json'
+        )
+
+        self.assertEqual(create_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(update_response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(delete_response.data, {'deleted': 2})
+        self.assertEqual(
+            sorted(SecretLevelData.objects.values_list('message', flat=True)),
+            ['bulk message 1 updated', 'bulk message 2']
+        )
+
+    def test_user_bulk_create_secrets_unauthorized(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        response = client.post(
+            reverse('secret-supervisor-bulk'),
+            headers={'Authorization': f'Bearer {access}'},
+            data=[{'message': 'bulk message'}],
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+    def test_write_notifies_change_channel(self):
+        with CaptureQueriesContext(connection) as queries:
+            SecretLevelData.objects.create(message="Top Secret Message 3")
+
+        self.assertTrue(any('pg_notify' in query['sql'] for query in queries.captured_queries))
+
+    def test_api_routes_skip_browser_middleware(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        response = client.get(reverse('secret-level'), headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertFalse(hasattr(response.wsgi_request, '_messages'))
+        # Browsable API pages still must not be framed.
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+    def test_admin_keeps_browser_middleware(self):
+        client = APIClient(enforce_csrf_checks=True)
+
+        # Posting the admin login form without a CSRF token is refused.
+        response = client.post(reverse('admin:login'), {'username': 'x', 'password': 'y'})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
+        self.assertTrue(hasattr(response.wsgi_request, '_messages'))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+
+class ChangeStreamTest(TransactionTestCase):
+    # The stream's checks run on other threads with their own connections,
+    # so the test data has to be committed.
+    def setUp(self):
+        self.regular_user = User.objects.create_user(username='regular_user', password='testpassword123')
+        self.secret_user = User.objects.create_user(username='secret_user', password='testpassword123')
+        self.secret_group = Group.objects.create(name='Secret')
+        self.secret_user.groups.add(self.secret_group)
+
+    async def open_stream(self, token):
+        access = (frozenset({'Secret'}), await sync_to_async(auth_changes.stamp)(self.secret_user.pk))
+        stream = ChangeStreamView().stream(self.secret_user, token, access)
+        self.assertTrue((await anext(stream)).startswith('retry:'))
+        return stream
+
+    async def test_event_stream_unauthorized(self):
+        access = RefreshToken.for_user(self.regular_user).access_token
+
+        unauthenticated = await self.async_client.get(reverse('events'))
+        forbidden = await self.async_client.get(reverse('events'), headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(unauthenticated.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(forbidden.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_event_stream_refused_under_wsgi(self):
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        response = APIClient().get(reverse('events'), headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    async def test_event_stream_authorized(self):
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        response = await self.async_client.get(reverse('events'), headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+    async def test_event_stream_sends_permitted_changes(self):
+        stream = await self.open_stream({'exp': time.time() + 60})
+
+        broker.dispatch(json.dumps({'model': 'auth.user', 'action': 'updated', 'id': 1}))
+        broker.dispatch(json.dumps({'model': 'secret_data.secretleveldata', 'action': 'created', 'id': 7}))
+        frame = await anext(stream)
+        await stream.aclose()
+
+        self.assertEqual(
+            frame,
+            'event: change\ndata: {"model": "secret_data.secretleveldata", "action": "created", "id": 7}\n\n'
+        )
+        self.assertEqual(broker.stats()['subscribers'], 0)
+
+    @override_settings(EVENTS_HEARTBEAT_SECONDS=0)
+    async def test_event_stream_ends_when_token_revoked_while_busy(self):
+        access = RefreshToken.for_user(self.secret_user).access_token
+        stream = await self.open_stream(access)
+
+        broker.dispatch(json.dumps({'model': 'tasks.task', 'action': 'created', 'id': 1}))
+        self.assertIn('"id": 1', await anext(stream))
+
+        # Events keep arriving, so the stream is never quiet long enough to time out.
+        await sync_to_async(revoke_token)(access)
+        broker.dispatch(json.dumps({'model': 'tasks.task', 'action': 'created', 'id': 2}))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertEqual(broker.stats()['subscribers'], 0)
+
+    @override_settings(EVENTS_HEARTBEAT_SECONDS=0)
+    async def test_event_stream_ends_when_removed_from_group(self):
+        access = RefreshToken.for_user(self.secret_user).access_token
+        stream = await self.open_stream(access)
+
+        await sync_to_async(self.secret_user.groups.remove)(self.secret_group)
+        broker.dispatch(json.dumps({'model': 'tasks.task', 'action': 'created', 'id': 1}))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=60, AUTH_CHANGE_SYNC_INTERVAL=60)
+    def test_event_stream_recheck_skips_unchanged_user(self):
+        token = RefreshToken.for_user(self.secret_user).access_token
+        access = (frozenset({'Secret'}), auth_changes.stamp(self.secret_user.pk))
+        ChangeStreamView.current_access(self.secret_user, token, access)
+
+        # Idle subscribers are re-checked every heartbeat; without a change
+        # to the user that costs no queries.
+        with self.assertNumQueries(0):
+            self.assertEqual(ChangeStreamView.current_access(self.secret_user, token, access), access)
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_added_items_are_members(self):
+        bloom = BloomFilter(size=1024, hashes=5)
+        bloom.add('revoked-jti-1')
+        bloom.add('revoked-jti-2')
+
+        self.assertIn('revoked-jti-1', bloom)
+        self.assertIn('revoked-jti-2', bloom)
+        self.assertNotIn('never-revoked-jti', bloom)
+
+
+
+class SubscriptionTest(SimpleTestCase):
+    async def test_overflow_is_replaced_by_resync(self):
+        subscription = Subscription(maxsize=2)
+        for pk in range(3):
+            subscription.push({'model': 'tasks.task', 'action': 'updated', 'id': pk})
+
+        event, frame = await subscription.get(timeout=1)
+        self.assertIs(event, RESYNC)
+        self.assertTrue(frame.startswith('event: resync'))
+        self.assertTrue(subscription.queue.empty())
@@ -0,0 +1,152 @@
+"""
+Per-request Server-Timing instrumentation, on when SERVER_TIMING_ENABLED.
+
+ServerTimingMiddleware gives each request a RequestTimings in a context
+variable, which follows the request into sync_to_async threads and offload().
+Code being measured wraps itself in phase(): database queries (time_queries,
+attached to every connection by secret_data.signals), decryption
+(secret_data.fields), serialization (TimedSerializerMixin) and JSON rendering
+(TimedJSONRenderer). Phases are exclusive: a query run while serializing
+counts toward db, not serialize, so the phases add up to at most the total.
+
+The response gets a Server-Timing header, which gunicorn.conf.py writes to
+the access log. With the setting off the middleware is never loaded and each
+phase() costs one context variable lookup.
+"""
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.renderers import JSONRenderer
+
+_current = ContextVar('request_timings', default=None)
+
+# Header order, with the description given to each phase's count.
+PHASES = (('db', 'queries'), ('decrypt', 'values'), ('serialize', None), ('render', None))
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = Counter()
+        self._stack = []
+
+    def enter(self, name):
+        now = perf_counter()
+        if self._stack:
+            # Pause the enclosing phase while this one runs.
+            parent = self._stack[-1]
+            self.durations[parent[0]] += now - parent[1]
+        self._stack.append([name, now])
+
+    def exit(self):
+        now = perf_counter()
+        name, started = self._stack.pop()
+        self.durations[name] += now - started
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def header(self):
+        total = perf_counter() - self.started
+        metrics = []
+        for name, unit in PHASES:
+            if name not in self.durations:
+                continue
+            metric = f'{name};dur={self.durations[name] * 1000:.1f}'
+            if unit:
+                metric += f';desc="{self.counts[name]} {unit}"'
+            metrics.append(metric)
+        app = total - sum(self.durations.values())
+        metrics.append(f'app;dur={max(app, 0) * 1000:.1f}')
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+class phase:
+    """Context manager charging the enclosed time to a phase of the current request, if instrumented."""
+    __slots__ = ('name', 'timings')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _current.get()
+        if self.timings is not None:
+            self.timings.enter(self.name)
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            self.timings.exit()
+
+
+def count(name, n=1):
+    timings = _current.get()
+    if timings is not None:
+        timings.counts[name] += n
+
+
+def time_queries(execute, sql, params, many, context):
+    """Database execute wrapper for the db phase."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    timings.counts['db'] += 1
+    timings.enter('db')
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.exit()
+
+
+class TimedSerializerMixin:
+    """Serializer mixin charging .data to the serialize phase."""
+
+    @property
+    def data(self):
+        with phase('serialize'):
+            return super().data
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        response['Server-Timing'] = timings.header()
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        response['Server-Timing'] = timings.header()
+        return response
@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from .views import SecretLevelView, SecretDetail, UserPermissionsView, SecretSupervisorList, SecretSupervisorDetail
+from .views import SecretLevelView, SecretDetail, AsyncSecretLevelView, AsyncSecretDetail, UserPermissionsView, SecretSupervisorList, SecretSupervisorDetail, SecretSupervisorBulk, MetricsView
 
 urlpatterns = [
-    path('', SecretLevelView.as_view(), name='secret-level'),
-    path('<int:pk>/', SecretDetail.as_view(), name='secret-detail'),
+    path('', (AsyncSecretLevelView if settings.ASYNC_API_VIEWS else SecretLevelView).as_view(), name='secret-level'),
+    path('<int:pk>/', (AsyncSecretDetail if settings.ASYNC_API_VIEWS else SecretDetail).as_view(), name='secret-detail'),
     path('user-permissions/', UserPermissionsView.as_view(), name='user-permissions'),
     path('supervisor/', SecretSupervisorList.as_view(), name='secret-supervisor-list'),
     path('supervisor/<int:pk>/', SecretSupervisorDetail.as_view(), name='secret-supervisor-detail'),
+    path('supervisor/bulk/', SecretSupervisorBulk.as_view(), name='secret-supervisor-bulk'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
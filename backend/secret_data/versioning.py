@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from django.db.models import F
+
+from .events import publish_change
+from .models import ResourceVersion
+
+
+def get_version(label):
+    """Current version of a collection: a single primary-key read."""
+    return ResourceVersion.objects.filter(name=label).values_list('version', flat=True).first() or 0
+
+
+def request_version(request, label):
+    """
+    get_version(label), read once per request: the list ETag and the
+    response cache key both come from it.
+    """
+    # DRF's Request wraps the HttpRequest the etag decorator sees.
+    request = getattr(request, '_request', request)
+    versions = request.__dict__.setdefault('_collection_versions', {})
+    if label not in versions:
+        versions[label] = get_version(label)
+    return versions[label]
+
+
+def bump_version(label):
+    """
+    Record a change to a collection. Called from post_save/post_delete, and
+    explicitly after bulk writes that bypass model signals.
+    """
+    updated = ResourceVersion.objects.filter(name=label).update(version=F('version') + 1)
+    if not updated:
+        ResourceVersion.objects.get_or_create(name=label, defaults={'version': 1})
+
+
+_bulk_state = threading.local()
+
+
+def version_bumps_suppressed():
+    return getattr(_bulk_state, 'suppressed', False)
+
+
+@contextmanager
+def single_version_bump(*models):
+    """
+    Suppress the per-row collection bumps sent by post_save/post_delete inside
+    a bulk write, then bump each model's collection once and publish a single
+    collection-wide change event. Use inside the same transaction as the write.
+    """
+
+    _bulk_state.suppressed = True
+    try:
+        yield
+    finally:
+        _bulk_state.suppressed = False
+    for model in models:
+        bump_version(model._meta.label_lower)
+        publish_change(model._meta.label_lower, 'changed')
+
+
+def query_digest(request):
+    # Different ?fields=/?cursor= values are different representations.
+    query = '&'.join(sorted(f'{key}={value}' for key, values in request.GET.lists() for value in values))
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()[:16]
+
+
+def collection_etag(model):
+    """Return an etag_func for django.views.decorators.http.etag on a list view."""
+    label = model._meta.label_lower
+
+    def etag_func(request, *args, **kwargs):
+        return f'{label}-{request_version(request, label)}-{query_digest(request)}'
+
+    return etag_func
+
+
+def object_etag(model):
+    """Return an etag_func for a detail view; None for a missing row lets the view 404."""
+    label = model._meta.label_lower
+
+    def etag_func(request, pk, *args, **kwargs):
+        version = model.objects.filter(pk=pk).values_list('version', flat=True).first()
+        if version is None:
+            return None
+        return f'{label}-{pk}-{version}-{query_digest(request)}'
+
+    return etag_func
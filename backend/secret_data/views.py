@@ -2,18 +2,47 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from .permissions import IsInSecretGroup, IsInSupervisorGroup
+from .permissions import IsInSecretGroup, IsInSupervisorGroup, get_group_names
 from .models import SecretLevelData
+from .versioning import collection_etag, object_etag, single_version_bump
+from .bulk import bulk_items, bulk_partial_update, bulk_delete
+from .response_cache import cache_list_response
 from .serializers import SecretLevelDataSerializer
-from django.http import Http404
+from .pagination import SecretCursorPagination, SearchPagination
+from .search import search_query, text_search
+from .asyncapi import AsyncAPIView, error_response, offload, render
+from .revocation import revocation_list, revoke_token
+from .authentication import auth_cache, auth_changes, RevocableJWTAuthentication
+from .events import EVENT_GROUPS, RESYNC, broker
+from .fields import decryption_cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.models import update_last_login
+from django.views.decorators.csrf import csrf_exempt
+import asyncio
+import time
+from django.db import connection, transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
+import os
+from django.conf import settings
 
 class UserPermissionsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
-        is_supervisor = user.groups.filter(name='Supervisor').exists()
-        is_secret = user.groups.filter(name='Secret').exists()  # Check both
+        groups = get_group_names(user)
+        is_supervisor = 'Supervisor' in groups
+        is_secret = 'Secret' in groups  # Check both
 
         return Response({
             'is_supervisor': is_supervisor,
@@ -21,6 +50,67 @@ class UserPermissionsView(APIView):
             'username': user.username,
         })
 
+class RevokeTokenView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, format=None):
+        # Revoke the access token used for this request and, if supplied, the
+        # caller's refresh token so it can't mint new access tokens.
+        refresh = None
+        if 'refresh' in request.data:
+            try:
+                refresh = RefreshToken(request.data['refresh'])
+            except TokenError as e:
+                return Response({'refresh': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+            if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response(
+                    {'refresh': ['Token does not belong to the current user.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        revoke_token(request.auth)
+        if refresh is not None:
+            revoke_token(refresh)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncTokenObtainPairView(View):
+    """
+    TokenObtainPairView for ASGI deployments (ASYNC_API_VIEWS). Credentials
+    go through aauthenticate(), whose ModelBackend hashes the password on a
+    worker thread, so a burst of logins doesn't stall the event loop and the
+    other requests it is serving. Responses, Axes lockouts and signals are
+    the same as the sync view's; other methods are handed to it.
+    """
+    sync_view = TokenObtainPairView
+    sync_handler = staticmethod(TokenObtainPairView.as_view())
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != 'POST':
+            return await sync_to_async(self.sync_handler)(request, *args, **kwargs)
+
+        view = self.sync_view()
+        request = view.initialize_request(request)
+        serializer = view.get_serializer_class()(context={'request': request})
+        try:
+            # Field checks only; the serializer's validate() would authenticate synchronously.
+            attrs = serializer.to_internal_value(request.data)
+            user = await aauthenticate(
+                request,
+                **{serializer.username_field: attrs[serializer.username_field], 'password': attrs['password']},
+            )
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(serializer.error_messages['no_active_account'], 'no_active_account')
+            if api_settings.UPDATE_LAST_LOGIN:
+                await sync_to_async(update_last_login)(None, user)
+        except APIException as e:
+            return error_response(e, view.get_authenticate_header(request))
+
+        refresh = serializer.get_token(user)
+        return render({'refresh': str(refresh), 'access': str(refresh.access_token)})
+
 class SecretDetail(APIView):
     permission_classes = [IsAuthenticated, IsInSecretGroup]
 
@@ -30,6 +120,7 @@ class SecretDetail(APIView):
         except SecretLevelData.DoesNotExist:
             raise Http404
 
+    @method_decorator(etag(object_etag(SecretLevelData)))
     def get(self, request, pk, format=None):
         secret = self.get_object(pk)
         serializer = SecretLevelDataSerializer(secret)
@@ -38,16 +129,64 @@ class SecretDetail(APIView):
 class SecretLevelView(APIView):
     permission_classes = [IsAuthenticated, IsInSecretGroup]
 
+    @method_decorator(etag(collection_etag(SecretLevelData)))
+    @cache_list_response(SecretLevelData)
     def get(self, request):
         data = SecretLevelData.objects.all()
+        paginator = SecretCursorPagination()
+        page = paginator.paginate_queryset(data, request, view=self)
+        if page is not None:
+            serializer = SecretLevelDataSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = SecretLevelDataSerializer(data, many=True)
         return Response(serializer.data)
 
+class AsyncSecretDetail(AsyncAPIView):
+    sync_view = SecretDetail
+    required_group = 'Secret'
+    etag_func = staticmethod(object_etag(SecretLevelData))
+
+    async def get(self, request, pk):
+        try:
+            secret = await SecretLevelData.objects.aget(id=pk)
+        except SecretLevelData.DoesNotExist:
+            raise Http404
+        return render(SecretLevelDataSerializer(secret).data)
+
+class AsyncSecretLevelView(AsyncAPIView):
+    sync_view = SecretLevelView
+    required_group = 'Secret'
+    etag_func = staticmethod(collection_etag(SecretLevelData))
+
+    async def get(self, request):
+        data = SecretLevelData.objects.all()
+        paginator = SecretCursorPagination()
+        page = await sync_to_async(paginator.paginate_queryset)(data, request, view=self)
+        rows = page if page is not None else [secret async for secret in data]
+        serialized = await offload(lambda: SecretLevelDataSerializer(rows, many=True).data)
+
+        if page is not None:
+            return render(paginator.get_paginated_response(serialized).data)
+        return render(serialized)
+
 class SecretSupervisorList(APIView):
     permission_classes = [IsAuthenticated, IsInSupervisorGroup]
 
+    @method_decorator(etag(collection_etag(SecretLevelData)))
     def get(self, request, format=None):
         secrets = SecretLevelData.objects.all()
+        query = search_query(request)
+        if query is not None:
+            secrets = text_search(secrets, 'message', query)
+            paginator = SearchPagination()
+        else:
+            paginator = SecretCursorPagination()
+        page = paginator.paginate_queryset(secrets, request, view=self)
+        if page is not None:
+            serializer = SecretLevelDataSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = SecretLevelDataSerializer(secrets, many=True)
         return Response(serializer.data)        
 
@@ -59,6 +198,30 @@ class SecretSupervisorList(APIView):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)     
 
+class SecretSupervisorBulk(APIView):
+    permission_classes = [IsAuthenticated, IsInSupervisorGroup]
+    delete_filter_fields = ['message']
+
+    def post(self, request, format=None):
+        serializer = SecretLevelDataSerializer(data=bulk_items(request.data), many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(), single_version_bump(SecretLevelData):
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request, format=None):
+        items = bulk_items(request.data)
+        with transaction.atomic(), single_version_bump(SecretLevelData):
+            updated = bulk_partial_update(SecretLevelData.objects.all(), SecretLevelDataSerializer, items)
+        return Response({'updated': list(updated)}, status=status.HTTP_202_ACCEPTED)
+
+    def delete(self, request, format=None):
+        with transaction.atomic(), single_version_bump(SecretLevelData):
+            deleted = bulk_delete(SecretLevelData.objects.all(), request.data, self.delete_filter_fields)
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
 class SecretSupervisorDetail(APIView):
     permission_classes = [IsAuthenticated, IsInSupervisorGroup]
 
@@ -69,6 +232,7 @@ class SecretSupervisorDetail(APIView):
         except SecretLevelData.DoesNotExist:
             raise Http404
 
+    @method_decorator(etag(object_etag(SecretLevelData)))
     def get(self, request, pk, format=None):
         secret = self.get_object(pk)
         serializer = SecretLevelDataSerializer(secret)
@@ -86,4 +250,159 @@ class SecretSupervisorDetail(APIView):
     def delete(self, request, pk, format=None):
         secret = self.get_object(pk)
         secret.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+def database_pool_stats():
+    """Usage of this worker's connection pool, or None when pooling is off."""
+    pool = connection.pool
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+    return {
+        **stats,
+        'in_use': in_use,
+        # 1.0 means every connection is checked out; requests_waiting then
+        # shows how many are queued for one.
+        'saturation': round(in_use / stats['pool_max'], 3) if stats.get('pool_max') else None,
+    }
+
+class MetricsView(APIView):
+    permission_classes = [IsAuthenticated, IsInSupervisorGroup]
+
+    def get(self, request, format=None):
+        # Counters are per gunicorn worker; pid says which worker answered.
+        return Response({
+            'pid': os.getpid(),
+            'auth_cache': auth_cache.stats(),
+            'decryption_cache': decryption_cache.stats(),
+            'events': broker.stats(),
+            'db_pool': database_pool_stats(),
+        })
+
+
+async def database_check(func, *args):
+    """
+    Run func(*args), which may query the database, for an open event stream.
+
+    It runs on the shared sync_to_async executor rather than the request's
+    own thread, and the connection goes back to the pool before returning.
+    A stream lasts until the client disconnects, so a thread-sensitive call
+    would pin a thread and a pooled connection to every subscriber.
+    """
+    def run():
+        try:
+            return func(*args)
+        finally:
+            if not connection.in_atomic_block:
+                connection.close()
+
+    return await sync_to_async(run, thread_sensitive=False)()
+
+
+class ChangeStreamView(View):
+    """
+    Server-Sent Events stream of task and secret changes.
+
+    Async so an idle subscriber holds no worker thread; serve it through the
+    ASGI application (mysite.asgi) with an ASGI worker. Clients authenticate
+    with the usual Authorization header (use fetch() streaming rather than
+    EventSource, which can't send headers) and only receive events for models
+    their groups can list. Events carry the model, action and id; clients
+    fetch the rows themselves, e.g. with a delta sync on /api/tasks/?since=.
+    Under WSGI each stream would pin a worker thread for as long as it stays
+    open, so requests not served through ASGI get a 503.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'detail': 'The event stream is only served by the ASGI application.'}, status=503)
+        try:
+            result = await database_check(self.authorize, request)
+        except AuthenticationFailed as e:
+            return JsonResponse({'detail': e.detail}, status=401)
+        if result is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+        user, token, access = result
+        if access is None:
+            return JsonResponse({'detail': 'You do not have permission to perform this action.'}, status=403)
+
+        response = StreamingHttpResponse(self.stream(user, token, access), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def authorize(request):
+        """
+        None without credentials, else (user, token, access): access is
+        (groups, stamp) as in current_access(), or None when the user's
+        groups can't see any events.
+        """
+        result = RevocableJWTAuthentication().authenticate(request)
+        if result is None:
+            return None
+        user, token = result
+        stamp = auth_changes.stamp(user.pk)
+        groups = get_group_names(user)
+        if not any(groups & allowed for allowed in EVENT_GROUPS.values()):
+            return user, token, None
+        return user, token, (groups, stamp)
+
+    @staticmethod
+    def next_check(token):
+        """Monotonic time of the next authorization check: a heartbeat away, or when the token expires."""
+        return time.monotonic() + max(min(settings.EVENTS_HEARTBEAT_SECONDS, token['exp'] - time.time()), 0)
+
+    @staticmethod
+    def current_access(user, token, access):
+        """
+        (groups, stamp) if the stream may go on, else None.
+
+        access is the previous result. secret_data.signals stamps the user in
+        AuthChange whenever the account or its groups change, so while the
+        stamp is unchanged nothing is re-read. The stamp is synced once per
+        AUTH_CHANGE_SYNC_INTERVAL for the whole worker, not per subscriber.
+        """
+        if token['exp'] <= time.time() or revocation_list.is_revoked(token['jti']):
+            return None
+        groups, stamp = access
+        latest = auth_changes.stamp(user.pk)
+        if latest == stamp:
+            return access
+        if not type(user).objects.filter(pk=user.pk, is_active=True).exists():
+            return None
+        groups = frozenset(user.groups.values_list('name', flat=True))
+        if not any(groups & allowed for allowed in EVENT_GROUPS.values()):
+            return None
+        return groups, latest
+
+    async def stream(self, user, token, access):
+        subscription = broker.subscribe()
+        try:
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+            deadline = self.next_check(token)
+            while True:
+                try:
+                    event, frame = await subscription.get(max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    event = None
+
+                # Re-checked on the clock, not only when the stream is quiet,
+                # so a busy subscriber can't outlive its token, a revocation,
+                # a deactivation or a group change.
+                if time.monotonic() >= deadline:
+                    access = await database_check(self.current_access, user, token, access)
+                    if access is None:
+                        return
+                    deadline = self.next_check(token)
+
+                groups, _ = access
+                if event is None:
+                    # Keep the connection alive through proxies.
+                    yield ": keepalive\n\n"
+                elif event is RESYNC or groups & EVENT_GROUPS.get(event.get('model'), frozenset()):
+                    yield frame
+        finally:
+            broker.unsubscribe(subscription)
@@ -0,0 +1,173 @@
+"""
+Denormalized counters kept in step with Task writes: CompletionCounter (per
+user), DailyTaskStats (per day and per user) and TaskBacklog (open tasks).
+
+Writes describe what changed as task_state() tuples before and after and call
+record_task_changes() in the same transaction. tasks.signals does this for
+save() and delete(); bulk paths that skip signals call it themselves.
+"""
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from secret_data.versioning import bump_version
+
+from .models import STATE_FIELDS, CompletionCounter, DailyTaskStats, Task, TaskBacklog, completion_state
+
+# ResourceVersion name bumped by rebuild_task_stats(), which rewrites the
+# rollup without any task changing; part of the stats endpoint's ETag.
+STATS_VERSION = 'tasks.dailytaskstats'
+
+
+def task_states(queryset):
+    return list(queryset.values_list(*STATE_FIELDS))
+
+
+def record_task_changes(before, after):
+    """
+    Apply a change from the task_state()s in before to those in after (the
+    same tasks; empty for creations or deletions) to every counter.
+    """
+    before, after = Counter(before), Counter(after)
+    removed, added = before - after, after - before
+    if not removed and not added:
+        return
+    _update_completion_counters(removed, added)
+    _update_daily_stats(removed, added)
+
+
+def _update_completion_counters(removed, added):
+    delta = Counter()
+    lost = set()
+    newest = {}
+    for state, count in removed.items():
+        completion = completion_state(state)
+        if completion is not None:
+            delta[completion[0]] -= count
+            lost.add(completion[0])
+    for state, count in added.items():
+        completion = completion_state(state)
+        if completion is not None:
+            user_id, completed_at = completion
+            delta[user_id] += count
+            if completed_at is not None and (user_id not in newest or completed_at > newest[user_id]):
+                newest[user_id] = completed_at
+
+    for user_id in delta.keys() | lost:
+        changes = {'total_completed': Greatest(F('total_completed') + delta[user_id], 0)}
+        if user_id in lost:
+            # The latest remaining completion is one backward step on the
+            # (user_completed, date_completed) index.
+            changes['last_completed_at'] = Subquery(
+                Task.objects.filter(user_completed=OuterRef('user_id'), completed=True, date_completed__isnull=False)
+                .order_by('-date_completed')
+                .values('date_completed')[:1]
+            )
+        elif user_id in newest:
+            completed_at = Value(newest[user_id])
+            changes['last_completed_at'] = Greatest(Coalesce('last_completed_at', completed_at), completed_at)
+        if not CompletionCounter.objects.filter(user_id=user_id).update(**changes):
+            # First completion for this user (or a missing row): count from scratch.
+            recount_completions([user_id])
+
+
+def _day_contributions(state):
+    """(day, user id or None, column) cells that one task state counts in, plus whether it is open."""
+    created_at, completed, user_id, date_completed = state
+    cells = [(timezone.localdate(created_at), None, 'created')]
+    if completed and date_completed is not None:
+        day = timezone.localdate(date_completed)
+        cells.append((day, None, 'completed'))
+        if user_id is not None:
+            cells.append((day, user_id, 'completed'))
+    return cells, not completed
+
+
+def _update_daily_stats(removed, added):
+    cells = defaultdict(Counter)
+    open_delta = 0
+    for states, sign in ((removed, -1), (added, 1)):
+        for state, count in states.items():
+            contributions, is_open = _day_contributions(state)
+            for day, user_id, column in contributions:
+                cells[day, user_id][column] += sign * count
+            open_delta += sign * count * is_open
+
+    for (day, user_id), columns in cells.items():
+        columns = {column: value for column, value in columns.items() if value}
+        if not columns:
+            continue
+        updated = DailyTaskStats.objects.filter(day=day, user_id=user_id).update(
+            **{column: F(column) + value for column, value in columns.items()}
+        )
+        if not updated:
+            stats, created = DailyTaskStats.objects.get_or_create(day=day, user_id=user_id, defaults=columns)
+            if not created:
+                DailyTaskStats.objects.filter(pk=stats.pk).update(
+                    **{column: F(column) + value for column, value in columns.items()}
+                )
+
+    if open_delta and not TaskBacklog.objects.filter(pk=1).update(open_tasks=F('open_tasks') + open_delta):
+        TaskBacklog.objects.update_or_create(pk=1, defaults={'open_tasks': Task.objects.filter(completed=False).count()})
+
+
+def recount_completions(user_ids):
+    """Recompute the CompletionCounter rows of user_ids from the tasks table."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    totals = {
+        row['user_completed']: row
+        for row in Task.objects.filter(completed=True, user_completed__in=user_ids)
+        .values('user_completed')
+        .annotate(total=Count('id'), last=Max('date_completed'))
+    }
+    CompletionCounter.objects.bulk_create(
+        [
+            CompletionCounter(
+                user_id=user_id,
+                total_completed=totals.get(user_id, {}).get('total', 0),
+                last_completed_at=totals.get(user_id, {}).get('last'),
+            )
+            for user_id in sorted(user_ids)
+        ],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['total_completed', 'last_completed_at'],
+    )
+
+
+def rebuild_task_stats():
+    """
+    Rebuild DailyTaskStats and TaskBacklog from the tasks table. On
+    PostgreSQL the tasks table is locked against writes until the caller's
+    transaction ends, so no change slips between the scan and the new rows.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {Task._meta.db_table} IN SHARE MODE')
+
+    cells = defaultdict(Counter)
+    for row in Task.objects.annotate(day=TruncDate('created_at')).values('day').annotate(n=Count('id')):
+        cells[row['day'], None]['created'] = row['n']
+    completed = (
+        Task.objects.filter(completed=True, date_completed__isnull=False)
+        .annotate(day=TruncDate('date_completed'))
+    )
+    for row in completed.values('day').annotate(n=Count('id')):
+        cells[row['day'], None]['completed'] = row['n']
+    for row in completed.filter(user_completed__isnull=False).values('day', 'user_completed').annotate(n=Count('id')):
+        cells[row['day'], row['user_completed']]['completed'] = row['n']
+
+    DailyTaskStats.objects.all().delete()
+    DailyTaskStats.objects.bulk_create(
+        [DailyTaskStats(day=day, user_id=user_id, **columns) for (day, user_id), columns in cells.items()],
+        batch_size=1000,
+    )
+    TaskBacklog.objects.update_or_create(pk=1, defaults={'open_tasks': Task.objects.filter(completed=False).count()})
+    bump_version(STATS_VERSION)
+    return len(cells)
@@ -0,0 +1,84 @@
+"""
+Keyword search over the encrypted Task.description through a blind index.
+
+Each distinct word of a description is normalized and stored in TaskKeyword
+as a truncated HMAC-SHA256 token under KEYWORD_INDEX_KEY. A search hashes the
+query words the same way and looks the tokens up on the (token, task) index,
+so only the matching rows are ever fetched and decrypted. The table reveals
+which tasks share a word and how many distinct words each has, but not the
+words themselves without the key.
+"""
+import hashlib
+import hmac
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import TaskKeyword
+
+TOKEN_BYTES = 16
+WORD_RE = re.compile(r'\w+')
+
+
+def _index_key():
+    if settings.KEYWORD_INDEX_KEY:
+        return settings.KEYWORD_INDEX_KEY.encode('utf-8')
+    # Derived from, but not equal to, the field encryption key. During a key
+    # rotation encrypted_model_fields takes a list of keys, the first of which
+    # encrypts new values; derive from that one.
+    key = settings.FIELD_ENCRYPTION_KEY
+    if isinstance(key, (list, tuple)):
+        key = key[0]
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return hmac.new(key, b'tasks.keywords', hashlib.sha256).digest()
+
+
+def normalize_words(text):
+    """Distinct casefolded, NFKC-normalized words of text."""
+    return set(WORD_RE.findall(unicodedata.normalize('NFKC', text or '').casefold()))
+
+
+def keyword_tokens(text):
+    key = _index_key()
+    return {
+        hmac.new(key, word.encode('utf-8'), hashlib.sha256).digest()[:TOKEN_BYTES]
+        for word in normalize_words(text)
+    }
+
+
+def index_task_keywords(descriptions):
+    """
+    Replace the indexed keywords of each task in descriptions, a mapping of
+    task id to plaintext description.
+    """
+    if not descriptions:
+        return
+    TaskKeyword.objects.filter(task_id__in=list(descriptions)).delete()
+    TaskKeyword.objects.bulk_create(
+        [
+            TaskKeyword(task_id=task_id, token=token)
+            for task_id, description in descriptions.items()
+            for token in keyword_tokens(description)
+        ],
+        batch_size=settings.BULK_BATCH_SIZE,
+    )
+
+
+def matching_task_ids(query):
+    """
+    Subquery of the ids of tasks whose description contains every word of
+    query. Returns None if query has no words.
+    """
+    tokens = keyword_tokens(query)
+    if not tokens:
+        return None
+    return (
+        TaskKeyword.objects.filter(token__in=tokens)
+        .values('task_id')
+        .annotate(matched=Count('token'))
+        .filter(matched=len(tokens))
+        .values('task_id')
+    )
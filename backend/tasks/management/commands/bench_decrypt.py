@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from encrypted_model_fields.fields import decrypt_str, encrypt_str
+
+from secret_data import fields
+
+
+class Command(BaseCommand):
+    help = "Compare serial and pooled decryption of task descriptions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--pool-size', type=int, nargs='+', default=[2, 4, 8])
+        parser.add_argument('--length', type=int, default=200, help="Plaintext length in characters.")
+
+    def handle(self, *args, **options):
+        plaintext = 'x' * options['length']
+
+        for rows in options['rows']:
+            ciphertexts = [encrypt_str(plaintext).decode('utf-8') for _ in range(rows)]
+
+            start = time.perf_counter()
+            for ciphertext in ciphertexts:
+                decrypt_str(ciphertext)
+            serial = time.perf_counter() - start
+            self.stdout.write(f"{rows:>7} rows  serial        {serial * 1000:9.1f} ms")
+
+            for pool_size in options['pool_size']:
+                # The cache is off so every row is really decrypted.
+                with override_settings(DECRYPTION_CACHE_ENABLED=False,
+                                       DECRYPTION_POOL_SIZE=pool_size,
+                                       DECRYPTION_PARALLEL_THRESHOLD=1):
+                    # Drop the previous pool so the new size takes effect.
+                    fields._executor = None
+                    start = time.perf_counter()
+                    fields.decrypt_many(ciphertexts)
+                    pooled = time.perf_counter() - start
+                self.stdout.write(
+                    f"{rows:>7} rows  pool={pool_size:<2}       {pooled * 1000:9.1f} ms"
+                    f"  ({serial / pooled:.2f}x)"
+                )
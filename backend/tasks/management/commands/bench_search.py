@@ -0,0 +1,77 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from secret_data.fields import decrypt_deferred, decrypt_many, defer_decryption, encrypt_many
+from tasks.keywords import index_task_keywords, matching_task_ids, normalize_words
+from tasks.models import Task
+
+VOCABULARY = [f'word{n}' for n in range(2000)]
+
+
+class Command(BaseCommand):
+    help = "Compare keyword search through the blind index with decrypting and scanning every description."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+        parser.add_argument('--words', type=int, default=30, help="Words per description.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Everything runs in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            self.run(options['rows'], options['words'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def run(self, rows, words, repeat):
+        rng = random.Random(0)
+        seeded = 0
+        for count in sorted(rows):
+            descriptions = [' '.join(rng.choices(VOCABULARY, k=words)) for _ in range(seeded, count)]
+            # About one task in a thousand mentions the searched word.
+            descriptions = [
+                f'{text} needle' if (seeded + i) % 1000 == 0 else text
+                for i, text in enumerate(descriptions)
+            ]
+            tasks = Task.objects.bulk_create(
+                [Task(title=f'Task {seeded + i}', description=ciphertext)
+                 for i, ciphertext in enumerate(encrypt_many(descriptions))],
+                batch_size=1000,
+            )
+            index_task_keywords({task.id: text for task, text in zip(tasks, descriptions)})
+            seeded = count
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE tasks_task, tasks_taskkeyword')
+
+            # Caches off so both approaches really decrypt what they read.
+            with override_settings(DECRYPTION_CACHE_ENABLED=False):
+                scan, scan_ids = self.time(repeat, self.scan)
+                indexed, indexed_ids = self.time(repeat, self.indexed)
+            assert scan_ids == indexed_ids
+            self.stdout.write(
+                f"{count:>7} rows  {len(scan_ids):>4} matches  "
+                f"scan {scan * 1000:9.1f} ms  index {indexed * 1000:7.1f} ms  ({scan / indexed:.0f}x)"
+            )
+
+    def time(self, repeat, search):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = search('needle')
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def scan(self, word):
+        # The only option without the index: decrypt every description.
+        tasks = list(defer_decryption(Task.objects.only('id'), 'description'))
+        plaintexts = decrypt_many([task.description_ciphertext for task in tasks])
+        return sorted(task.id for task, text in zip(tasks, plaintexts) if word in normalize_words(text))
+
+    def indexed(self, word):
+        tasks = list(defer_decryption(Task.objects.only('id').filter(id__in=matching_task_ids(word)), 'description'))
+        decrypt_deferred(tasks, 'description')
+        return sorted(task.id for task in tasks)
@@ -0,0 +1,62 @@
+import time
+import tracemalloc
+
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from secret_data.fields import encrypt_many
+from tasks.models import Task
+from tasks.views import TaskSupervisorList
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory of buffered and streamed (?stream=true) supervisor task exports."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+        parser.add_argument('--length', type=int, default=200, help="Description length in characters.")
+
+    def handle(self, *args, **options):
+        # Everything runs in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            self.run(options['rows'], options['length'])
+            transaction.set_rollback(True)
+
+    def run(self, rows, length):
+        user = User.objects.create_user(username='bench-stream-user')
+        user.groups.add(Group.objects.get_or_create(name='Supervisor')[0])
+        view = TaskSupervisorList.as_view()
+        factory = APIRequestFactory()
+
+        seeded = 0
+        for count in sorted(rows):
+            descriptions = [f'{i:08d}'.ljust(length, 'x') for i in range(seeded, count)]
+            Task.objects.bulk_create(
+                [Task(title=f'Task {seeded + i}', description=ciphertext)
+                 for i, ciphertext in enumerate(encrypt_many(descriptions))],
+                batch_size=1000,
+            )
+            seeded = count
+
+            for label, params in (('buffered', {}), ('streamed', {'stream': 'true'})):
+                request = factory.get('/api/tasks/supervisor/', params)
+                force_authenticate(request, user=user)
+                # Caches off so both modes really read, decrypt and serialize every row.
+                with override_settings(DECRYPTION_CACHE_ENABLED=False, RESPONSE_CACHE_ENABLED=False):
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    response = view(request)
+                    if response.streaming:
+                        size = sum(len(chunk) for chunk in response.streaming_content)
+                    else:
+                        size = len(response.render().content)
+                    elapsed = time.perf_counter() - start
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                self.stdout.write(
+                    f"{count:>7} rows  {label:<9} {elapsed * 1000:9.1f} ms  "
+                    f"peak {peak / 2**20:7.1f} MiB  body {size / 2**20:6.1f} MiB"
+                )
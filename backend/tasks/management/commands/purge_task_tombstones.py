@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete task tombstones older than TASK_TOMBSTONE_RETENTION_DAYS."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} task tombstone(s).")
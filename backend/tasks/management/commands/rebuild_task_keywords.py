@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from secret_data.streaming import queryset_batches
+from secret_data.versioning import bump_version
+from secret_data.fields import decrypt_deferred, defer_decryption
+from tasks.keywords import index_task_keywords
+from tasks.models import Task, TaskKeyword
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blind keyword index (TaskKeyword) from every task description."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        tasks = defer_decryption(Task.objects.only('id').order_by('id'), 'description')
+        indexed = 0
+        with transaction.atomic():
+            TaskKeyword.objects.all().delete()
+            for batch in queryset_batches(tasks, options['batch_size']):
+                decrypt_deferred(batch, 'description')
+                index_task_keywords({task.id: task.description for task in batch})
+                indexed += len(batch)
+            # ?search= results come from the index, so cached list responses
+            # and ETags keyed on the task version must not outlive it.
+            bump_version(Task._meta.label_lower)
+        self.stdout.write(f"Indexed keywords of {indexed} task(s).")
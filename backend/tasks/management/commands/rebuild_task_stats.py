@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tasks.counters import rebuild_task_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily task rollup (DailyTaskStats) and open backlog (TaskBacklog) from the tasks table."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = rebuild_task_stats()
+        self.stdout.write(f"Rebuilt {rows} daily task stats row(s).")
@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_alter_task_user_completed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='tasks_task_created_5b4d0b_idx'),
+        ),
+    ]
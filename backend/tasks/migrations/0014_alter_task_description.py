@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:52
+
+import secret_data.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_task_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='description',
+            field=secret_data.fields.CachedEncryptedTextField(),
+        ),
+    ]
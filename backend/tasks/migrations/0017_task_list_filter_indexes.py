@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-18 15:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0016_task_updated_at_tasktombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='user_completed',
+            field=models.ForeignKey(blank=True, db_column='user_completed', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['completed', 'created_at', 'id'], name='tasks_task_complet_b9fcf4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user_completed', 'date_completed'], name='tasks_task_user_co_bb4b86_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['date_completed', 'id'], name='tasks_task_date_co_a10d7a_idx'),
+        ),
+    ]
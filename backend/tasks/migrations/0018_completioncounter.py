@@ -0,0 +1,40 @@
+# Generated by Django 6.1.2 on 2026-10-18 15:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def count_existing_completions(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    CompletionCounter = apps.get_model('tasks', 'CompletionCounter')
+    rows = (
+        Task.objects.filter(completed=True, user_completed__isnull=False)
+        .values('user_completed')
+        .annotate(total=Count('id'), last=Max('date_completed'))
+    )
+    CompletionCounter.objects.bulk_create([
+        CompletionCounter(user_id=row['user_completed'], total_completed=row['total'], last_completed_at=row['last'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tasks', '0017_task_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompletionCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='completion_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_completed', models.PositiveIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(count_existing_completions, migrations.RunPython.noop),
+    ]
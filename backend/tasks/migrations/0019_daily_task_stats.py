@@ -0,0 +1,60 @@
+# Generated by Django 6.1.2 on 2026-10-18 16:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def rollup_existing_tasks(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    DailyTaskStats = apps.get_model('tasks', 'DailyTaskStats')
+    TaskBacklog = apps.get_model('tasks', 'TaskBacklog')
+
+    cells = {}
+    for row in Task.objects.annotate(day=TruncDate('created_at')).values('day').annotate(n=Count('id')):
+        cells.setdefault((row['day'], None), {})['created'] = row['n']
+    completed = Task.objects.filter(completed=True, date_completed__isnull=False).annotate(day=TruncDate('date_completed'))
+    for row in completed.values('day').annotate(n=Count('id')):
+        cells.setdefault((row['day'], None), {})['completed'] = row['n']
+    for row in completed.filter(user_completed__isnull=False).values('day', 'user_completed').annotate(n=Count('id')):
+        cells.setdefault((row['day'], row['user_completed']), {})['completed'] = row['n']
+
+    DailyTaskStats.objects.bulk_create(
+        [DailyTaskStats(day=day, user_id=user_id, **columns) for (day, user_id), columns in cells.items()],
+        batch_size=1000,
+    )
+    TaskBacklog.objects.create(pk=1, open_tasks=Task.objects.filter(completed=False).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0018_completioncounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskBacklog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_tasks', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyTaskStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('created', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'user'), name='tasks_dailytaskstats_day_user', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(rollup_existing_tasks, migrations.RunPython.noop),
+    ]
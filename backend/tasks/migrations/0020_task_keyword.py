@@ -0,0 +1,25 @@
+# Generated by Django 6.1.2 on 2026-10-18 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0019_daily_task_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.BinaryField(max_length=16)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keywords', to='tasks.task')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'task'), name='tasks_taskkeyword_token_task')],
+            },
+        ),
+    ]
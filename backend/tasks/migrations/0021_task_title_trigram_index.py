@@ -0,0 +1,18 @@
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+from secret_data.search import trigram_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0020_task_keyword'),
+    ]
+
+    operations = [
+        trigram_index(
+            'tasks', 'task',
+            django.contrib.postgres.indexes.GinIndex(fields=['title'], name='tasks_task_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
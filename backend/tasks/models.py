@@ -1,14 +1,120 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from encrypted_model_fields.fields import EncryptedTextField
 from django.contrib.auth.models import User
+from secret_data.models import VersionedModel
+from secret_data.fields import CachedEncryptedTextField
 # Create your models here.
-class Task(models.Model):
+class Task(VersionedModel):
     title = models.CharField(max_length=200)
-    description = EncryptedTextField()
+    description = CachedEncryptedTextField()
     completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     date_completed = models.DateTimeField(blank=True, null=True)
-    user_completed = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, db_column='user_completed')
+    # Indexed by the (user_completed, date_completed) index below.
+    user_completed = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, db_column='user_completed', db_index=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination orders and seeks on (created_at, id).
+            models.Index(fields=['created_at', 'id']),
+            # List filters (TaskFilterSerializer), each with its ordering.
+            models.Index(fields=['completed', 'created_at', 'id']),
+            models.Index(fields=['user_completed', 'date_completed']),
+            models.Index(fields=['date_completed', 'id']),
+            # Supervisor ?q= search (secret_data/search.py).
+            GinIndex(fields=['title'], name='tasks_task_title_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values, **kwargs):
+        # kwargs carries fetch_mode on Django versions that pass it.
+        instance = super().from_db(db, field_names, values, **kwargs)
+        # State as loaded, so tasks.signals can adjust the counters in
+        # tasks.counters by the difference when the task is saved.
+        if STATE_FIELDS_SET.issubset(field_names):
+            instance._loaded_state = task_state(instance)
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        # The stored state may have changed; tasks.signals re-reads it on save.
+        self.__dict__.pop('_loaded_state', None)
 
     def __str__(self):
         return f"Title: {self.title} \nDescription: {self.description}"
+
+
+# Fields that decide how a task is counted by tasks.counters.
+STATE_FIELDS = ('created_at', 'completed', 'user_completed_id', 'date_completed')
+STATE_FIELDS_SET = set(STATE_FIELDS)
+
+
+def task_state(task):
+    return tuple(getattr(task, name) for name in STATE_FIELDS)
+
+
+def completion_state(state):
+    """(user id, completion time) if a task_state() counts as completed by a user, else None."""
+    _, completed, user_id, date_completed = state
+    if completed and user_id is not None:
+        return user_id, date_completed
+    return None
+
+
+class TaskTombstone(models.Model):
+    # Left behind when a Task is deleted so delta syncs (?since=) can report it.
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Task {self.task_id} deleted at {self.deleted_at}"
+
+
+class CompletionCounter(models.Model):
+    # Denormalized per-user summary for /api/tasks/completed/, kept in step
+    # with Task writes by tasks.counters so reading it never counts rows.
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='completion_counter')
+    total_completed = models.PositiveIntegerField(default=0)
+    last_completed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.total_completed} completed"
+
+
+class DailyTaskStats(models.Model):
+    # Per-day rollup kept by tasks.counters: the row with no user counts all
+    # tasks created and completed that day, and one row per user counts that
+    # user's completions.
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True)
+    created = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'user'], nulls_distinct=False, name='tasks_dailytaskstats_day_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} ({self.user_id or 'all'}): {self.created} created, {self.completed} completed"
+
+
+class TaskBacklog(models.Model):
+    # Single row (pk=1) holding the number of open tasks, kept by tasks.counters.
+    open_tasks = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.open_tasks} open tasks"
+
+
+class TaskKeyword(models.Model):
+    # Blind index over Task.description kept by tasks.keywords: one keyed
+    # HMAC token per distinct normalized word, never the word itself.
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='keywords')
+    token = models.BinaryField(max_length=16)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'task'], name='tasks_taskkeyword_token_task'),
+        ]
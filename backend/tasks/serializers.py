@@ -1,8 +1,191 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive
 from rest_framework import serializers
-from .models import Task
+from .models import Task, task_state
+from secret_data.fields import decrypt_deferred, encrypt_many
+from .counters import record_task_changes
+from .keywords import index_task_keywords, matching_task_ids
+from secret_data.timing import TimedSerializerMixin
+
+class TaskListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    def to_representation(self, data):
+        # Querysets built with defer_decryption() carry raw ciphertexts;
+        # decrypt them as one batch before serializing row by row.
+        tasks = list(data.all() if hasattr(data, 'all') else data)
+        decrypt_deferred(tasks, 'description')
+        return super().to_representation(tasks)
+
+    def create(self, validated_data):
+        # Encrypt all descriptions as one batch, then INSERT with bulk_create.
+        ciphertexts = encrypt_many([item['description'] for item in validated_data])
+        tasks = [
+            Task(**{**item, 'description': ciphertext})
+            for item, ciphertext in zip(validated_data, ciphertexts)
+        ]
+        Task.objects.bulk_create(tasks, batch_size=settings.BULK_BATCH_SIZE)
+        # bulk_create() sends no post_save, so tasks.signals can't count these.
+        record_task_changes([], [task_state(task) for task in tasks])
+        index_task_keywords({task.id: item['description'] for task, item in zip(tasks, validated_data)})
+
+        for task, item in zip(tasks, validated_data):
+            task.description = item['description']
+        return tasks
 
-class TaskSerializer(serializers.ModelSerializer):
+
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'completed', 'created_at', 'date_completed', 'user_completed']  # Explicit fields
-        read_only_fields = ['id', 'created_at']  # Auto fields
+        fields = ['id', 'title', 'description', 'completed', 'created_at', 'updated_at', 'date_completed', 'user_completed']  # Explicit fields
+        read_only_fields = ['id', 'created_at', 'updated_at']  # Auto fields
+        list_serializer_class = TaskListSerializer
+
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. TaskSerializer(tasks, many=True, fields=['id', 'title'])
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def create(self, validated_data):
+        task = super().create(validated_data)
+        index_task_keywords({task.id: validated_data['description']})
+        return task
+
+    def update(self, instance, validated_data):
+        task = super().update(instance, validated_data)
+        if 'description' in validated_data:
+            index_task_keywords({task.id: validated_data['description']})
+        return task
+
+
+class TaskCompletionSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
+    completed = serializers.BooleanField(default=True)
+
+
+class TaskFilterSerializer(serializers.Serializer):
+    """
+    Query parameters for filtering and ordering the task list endpoints.
+    Every filter, alone or combined with the ordering, is served by one of
+    the indexes in Task.Meta; ?search= is a lookup on the TaskKeyword index.
+    """
+    LOOKUPS = {
+        'completed': 'completed',
+        'user_completed': 'user_completed_id',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+        'completed_after': 'date_completed__gte',
+        'completed_before': 'date_completed__lt',
+    }
+    ORDERINGS = {
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+        'date_completed': ('date_completed', 'id'),
+        '-date_completed': ('-date_completed', '-id'),
+    }
+
+    completed = serializers.BooleanField(required=False)
+    user_completed = serializers.IntegerField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    completed_after = serializers.DateTimeField(required=False)
+    completed_before = serializers.DateTimeField(required=False)
+    search = serializers.CharField(required=False)
+    ordering = serializers.ChoiceField(choices=list(ORDERINGS), default='created_at')
+
+    def validate_search(self, value):
+        matches = matching_task_ids(value)
+        if matches is None:
+            raise serializers.ValidationError('Enter at least one word to search for.')
+        return matches
+
+
+class TaskStatsRangeSerializer(serializers.Serializer):
+    """
+    ?start=&end= dates (inclusive) for the supervisor stats endpoint. Either
+    may be omitted: the range then ends today and covers STATS_DEFAULT_DAYS.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        end = data.get('end') or timezone.localdate()
+        start = data.get('start') or end - timedelta(days=settings.STATS_DEFAULT_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError({'start': ['Must not be after end.']})
+        if (end - start).days + 1 > settings.STATS_MAX_DAYS:
+            raise serializers.ValidationError({'end': [f'The range may cover at most {settings.STATS_MAX_DAYS} days.']})
+        return {'start': start, 'end': end}
+
+
+def task_list_params(request):
+    """
+    Parse the list filters and ?ordering= into (filters, ordering) for
+    task_list_queryset(). Ordering by date_completed puts open tasks last
+    (first with -date_completed).
+    """
+    # A plain dict, not the QueryDict: DRF reads a BooleanField missing from
+    # form-style input as False rather than absent.
+    serializer = TaskFilterSerializer(data=request.query_params.dict())
+    serializer.is_valid(raise_exception=True)
+    params = dict(serializer.validated_data)
+
+    ordering = TaskFilterSerializer.ORDERINGS[params.pop('ordering')]
+    matches = params.pop('search', None)
+    filters = {TaskFilterSerializer.LOOKUPS[name]: value for name, value in params.items()}
+    if matches is not None:
+        filters['id__in'] = matches
+    return filters, ordering
+
+
+def requested_fields(request):
+    """
+    Parse ?fields=id,title,... into a list of TaskSerializer fields.
+
+    Returns None when the parameter is absent so callers serialize everything.
+    The same list is used for the queryset's only(), so a description that
+    isn't asked for is neither fetched nor decrypted.
+    """
+    raw = request.query_params.get('fields')
+    if raw is None:
+        return None
+
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in TaskSerializer.Meta.fields]
+    if unknown or not fields:
+        raise serializers.ValidationError({
+            'fields': f"Choose from: {', '.join(TaskSerializer.Meta.fields)}."
+        })
+
+    return fields
+
+
+def parse_watermark(value):
+    """
+    Parse a delta-sync watermark. '0' asks for everything and returns None;
+    otherwise the value must be a timezone-aware ISO 8601 timestamp as
+    returned in a previous response.
+    """
+    if value == '0':
+        return None
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is None or is_naive(since):
+        raise serializers.ValidationError({'since': ['Expected a watermark from a previous response, or 0.']})
+    return since
+
+
+def format_watermark(value):
+    return value.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
@@ -0,0 +1,68 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from secret_data.versioning import single_version_bump
+
+from .counters import record_task_changes
+from .models import STATE_FIELDS, Task, TaskTombstone, task_state
+
+
+@receiver(pre_save, sender=Task)
+def task_saving(sender, instance, **kwargs):
+    # Tasks loaded without the counted fields (e.g. through only()) don't
+    # know their previous state; read it before the row is overwritten.
+    if instance.pk is not None and not hasattr(instance, '_loaded_state'):
+        state = Task.objects.filter(pk=instance.pk).values_list(*STATE_FIELDS).first()
+        if state is not None:
+            instance._loaded_state = state
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    before = getattr(instance, '_loaded_state', None)
+    after = task_state(instance)
+    record_task_changes([] if created or before is None else [before], [after])
+    instance._loaded_state = after
+
+
+_bulk_state = threading.local()
+
+
+@contextmanager
+def bulk_task_delete():
+    """
+    Skip task_deleted's per-row tombstone and counter updates for deletes
+    inside the block; the caller records them once for the whole batch.
+    """
+    _bulk_state.deleting = True
+    try:
+        yield
+    finally:
+        _bulk_state.deleting = False
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    if getattr(_bulk_state, 'deleting', False):
+        return
+    TaskTombstone.objects.create(task_id=instance.pk)
+    record_task_changes([task_state(instance)], [])
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Task.user_completed is SET_NULL, which the deletion collector applies
+    # with a bare UPDATE: no versions, no updated_at, so ETags, cached list
+    # responses and ?since= clients would keep the deleted user's id. Clear
+    # it here instead, in the deletion's transaction. The user's own counter
+    # and daily stats rows are deleted with it.
+    tasks = Task.objects.filter(user_completed=instance.pk)
+    if tasks.exists():
+        with single_version_bump(Task):
+            tasks.update(user_completed=None, version=F('version') + 1, updated_at=timezone.now())
@@ -1,13 +1,39 @@
 from rest_framework.test import APITestCase, APIClient
+from django.test import SimpleTestCase, override_settings
 from rest_framework import status
 from django.contrib.auth.models import User, Group, Permission
+from django.core.cache import caches
 from django.urls import reverse
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Task
-from datetime import datetime
+from .models import Task, TaskTombstone, CompletionCounter, DailyTaskStats, TaskBacklog, TaskKeyword
+from .counters import rebuild_task_stats
+from .keywords import keyword_tokens
+from django.conf import settings
+from django.core.management import call_command
+from secret_data import fields
+from secret_data.fields import Ciphertext, DecryptionCache, decryption_cache, decrypt_many, encrypt_many, get_executor
+from .serializers import TaskFilterSerializer
+from .views import task_list_queryset, AsyncTaskList, AsyncTaskDetail
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+from django.db import connection
+from secret_data.search import text_search, trigram_enabled
+from django.test.utils import CaptureQueriesContext
+from encrypted_model_fields.fields import encrypt_str
+from cryptography.fernet import InvalidToken
+from datetime import datetime, timedelta, timezone as dt_timezone
+import json
+import os
+from base64 import b64encode
+from unittest import mock
+from urllib.parse import urlencode
 
 class TaskTest(APITestCase):
     def setUp(self):
+        # Versions roll back with each test's transaction, so cached responses would be reused.
+        caches['responses'].clear()
+
         self.regular_user = User.objects.create_user(
             username='regular_user',
             email='regular@test.com',
@@ -304,4 +330,1080 @@ class TaskTest(APITestCase):
 
         self.assertEqual(input_response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(input_response.data['title'], output_response.data['title'])
-        self.assertEqual(input_response.data['description'], output_response.data['description'])
\ No newline at end of file
+        self.assertEqual(input_response.data['description'], output_response.data['description'])
+
+    def test_user_get_task_list_paginated(self):
+        client = APIClient()
+        url = reverse('task-list')
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        first_page = client.get(
+            url,
+            {'page_size': 1},
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first_page.data['results']), 1)
+        self.assertEqual(first_page.data['results'][0]['id'], self.task_1.id)
+        self.assertIsNotNone(first_page.data['next'])
+
+        # Following the opaque cursor should return the next row in (created_at, id) order.
+        second_page = client.get(
+            first_page.data['next'],
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(second_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_page.data['results'][0]['id'], self.task_2.id)
+        self.assertIsNone(second_page.data['next'])
+
+    def test_user_get_task_list_paginated_by_date_completed(self):
+        client = APIClient()
+        url = reverse('task-list')
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.secret_user).access_token}'}
+        later = Task.objects.create(title='Done later', description='Done.', completed=True,
+                                    date_completed=datetime(2026, 1, 2, tzinfo=dt_timezone.utc))
+        earlier = Task.objects.create(title='Done earlier', description='Done.', completed=True,
+                                      date_completed=datetime(2026, 1, 1, tzinfo=dt_timezone.utc))
+        in_order = [earlier.id, later.id, self.task_1.id, self.task_2.id]
+
+        for ordering, expected in (('date_completed', in_order), ('-date_completed', in_order[::-1])):
+            pages = [client.get(url, {'ordering': ordering, 'page_size': 1}, headers=headers).data]
+            while pages[-1]['next']:
+                pages.append(client.get(pages[-1]['next'], headers=headers).data)
+            self.assertEqual([task['id'] for page in pages for task in page['results']], expected, ordering)
+
+            # And back again through the previous links.
+            backwards = [pages[-1]]
+            while backwards[-1]['previous']:
+                backwards.append(client.get(backwards[-1]['previous'], headers=headers).data)
+            self.assertEqual([task['id'] for page in backwards for task in page['results']], expected[::-1], ordering)
+
+    def test_user_get_task_list_rejects_forged_cursor(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        for position in ('[null,1]', '["2026-01-01T00:00:00Z",null]', '["yesterday",1]', '[1]'):
+            cursor = b64encode(urlencode({'p': position}).encode()).decode()
+            response = client.get(url, {'cursor': cursor}, headers={'Authorization': f'Bearer {access}'})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+    def test_user_get_task_list_unpaginated_by_default(self):
+        client = APIClient()
+        url = reverse('task-list')
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        # Legacy clients still get a bare list unless they opt in.
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_supervisor_get_task_list_paginated(self):
+        client = APIClient()
+        url = reverse('task-supervisor-list')
+        refresh = RefreshToken.for_user(self.supervisor_user)
+
+        response = client.get(
+            url,
+            {'page_size': 5},
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task_1.id, self.task_2.id])
+        self.assertIsNone(response.data['next'])
+
+    def test_user_get_task_list_filtered(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+        Task.objects.filter(id=self.task_2.id).update(
+            completed=True,
+            user_completed=self.secret_user,
+            date_completed=datetime(2026, 1, 2, tzinfo=dt_timezone.utc)
+        )
+
+        completed = client.get(url, {'completed': 'true'}, headers={'Authorization': f'Bearer {access}'})
+        still_open = client.get(url, {'completed': 'false'}, headers={'Authorization': f'Bearer {access}'})
+        by_user = client.get(
+            url,
+            {'user_completed': self.secret_user.id, 'completed_after': '2026-01-01T00:00:00Z', 'ordering': '-date_completed'},
+            headers={'Authorization': f'Bearer {access}'}
+        )
+        newest_first = client.get(url, {'ordering': '-created_at'}, headers={'Authorization': f'Bearer {access}'})
+        invalid = client.get(url, {'ordering': 'description'}, headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual([task['id'] for task in completed.data], [self.task_2.id])
+        self.assertEqual([task['id'] for task in still_open.data], [self.task_1.id])
+        self.assertEqual([task['id'] for task in by_user.data], [self.task_2.id])
+        self.assertEqual([task['id'] for task in newest_first.data], [self.task_2.id, self.task_1.id])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_task_list_filters_use_indexes(self):
+        ciphertext = encrypt_many(['description'])[0]
+        start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                description=ciphertext,
+                completed=i % 100 == 0,
+                user_completed=self.secret_user if i % 100 == 0 else None,
+                date_completed=start + timedelta(hours=i) if i % 100 == 0 else None,
+            )
+            for i in range(5000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tasks_task')
+            # With statistics in place, only an unusable index would leave a sequential scan.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        later = timezone.now() + timedelta(hours=1)
+        cases = [
+            ({'completed': True}, 'created_at', 'completed'),
+            ({'user_completed_id': self.secret_user.id}, '-date_completed', 'user_completed'),
+            ({'created_at__gte': later}, 'created_at', 'created_at'),
+            ({'created_at__lt': start}, '-created_at', 'created_at'),
+            ({'date_completed__gte': start, 'date_completed__lt': start + timedelta(days=3)}, 'created_at', 'date_completed'),
+            ({'date_completed__isnull': False}, '-date_completed', 'date_completed'),
+        ]
+        for filters, ordering, column in cases:
+            with self.subTest(filters=filters, ordering=ordering):
+                plan = task_list_queryset(None, TaskFilterSerializer.ORDERINGS[ordering], filters).explain()
+                index_conditions = [line for line in plan.splitlines() if 'Index Cond' in line]
+                self.assertNotIn('Seq Scan', plan)
+                self.assertTrue(any(column in line for line in index_conditions), plan)
+
+    @override_settings(STREAM_CHUNK_SIZE=1)
+    def test_supervisor_get_task_list_streamed(self):
+        client = APIClient()
+        url = reverse('task-supervisor-list')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        buffered = client.get(url, headers={'Authorization': f'Bearer {access}'}, format='json')
+        streamed = client.get(url, {'stream': 'true'}, headers={'Authorization': f'Bearer {access}'}, format='json')
+        sparse = client.get(url, {'stream': 'true', 'fields': 'id,description'}, headers={'Authorization': f'Bearer {access}'}, format='json')
+
+        self.assertEqual(streamed.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(json.loads(b''.join(streamed.streaming_content)), json.loads(buffered.content))
+        self.assertEqual(json.loads(b''.join(sparse.streaming_content)), [
+            {'id': self.task_1.id, 'description': 'This is the description for test task 1.'},
+            {'id': self.task_2.id, 'description': 'This is the description for test task 2.'},
+        ])
+
+
+    def test_task_description_decryption_is_cached(self):
+        decryption_cache.clear()
+
+        Task.objects.get(id=self.task_1.id)
+        task = Task.objects.get(id=self.task_1.id)
+
+        self.assertEqual(task.description, 'This is the description for test task 1.')
+        self.assertEqual(decryption_cache.stats()['misses'], 1)
+        self.assertEqual(decryption_cache.stats()['hits'], 1)
+
+    @override_settings(DECRYPTION_CACHE_ENABLED=False)
+    def test_task_description_decryption_cache_disabled(self):
+        decryption_cache.clear()
+
+        task = Task.objects.get(id=self.task_1.id)
+
+        self.assertEqual(task.description, 'This is the description for test task 1.')
+        self.assertEqual(decryption_cache.stats()['size'], 0)
+
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_task_list_server_timing(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                reverse('task-list'),
+                headers={'Authorization': f'Bearer {refresh.access_token}'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = {metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')}
+        self.assertEqual(list(metrics), ['db', 'decrypt', 'serialize', 'render', 'app', 'total'])
+        self.assertIn(f'desc="{len(queries.captured_queries)} queries"', metrics['db'])
+        self.assertIn('desc="2 values"', metrics['decrypt'])
+
+    def test_task_list_server_timing_disabled(self):
+        client = APIClient()
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        response = client.get(
+            reverse('task-list'),
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertNotIn('Server-Timing', response)
+
+    def test_user_get_task_list_sparse_fields(self):
+        client = APIClient()
+        url = reverse('task-list')
+        refresh = RefreshToken.for_user(self.secret_user)
+        decryption_cache.clear()
+
+        response = client.get(
+            url,
+            {'fields': 'id,title,completed,date_completed'},
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'title', 'completed', 'date_completed'})
+        # The description column was never loaded, so nothing was decrypted.
+        self.assertEqual(decryption_cache.stats()['misses'], 0)
+        self.assertEqual(decryption_cache.stats()['hits'], 0)
+
+    def test_supervisor_get_task_detail_sparse_fields(self):
+        client = APIClient()
+        url = reverse('task-supervisor-detail', args=[self.task_1.id])
+        refresh = RefreshToken.for_user(self.supervisor_user)
+
+        response = client.get(
+            url,
+            {'fields': 'id,description'},
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': self.task_1.id, 'description': self.task_1.description})
+
+    def test_user_get_task_list_unknown_field(self):
+        client = APIClient()
+        url = reverse('task-list')
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        response = client.get(
+            url,
+            {'fields': 'id,secret_column'},
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_user_get_task_list_undecryptable_description(self):
+        client = APIClient()
+        url = reverse('task-list')
+        refresh = RefreshToken.for_user(self.secret_user)
+
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE tasks_task SET description = 'not-a-fernet-token' WHERE id = %s", [self.task_2.id])
+
+        response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {refresh.access_token}'},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # The detail views fail the same way instead of returning the ciphertext.
+        supervisor_headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.supervisor_user).access_token}'}
+        for detail_url, headers in ((reverse('task-detail', args=[self.task_2.id]), {'Authorization': f'Bearer {refresh.access_token}'}),
+                                    (reverse('task-supervisor-detail', args=[self.task_2.id]), supervisor_headers)):
+            response = client.get(detail_url, headers=headers, format='json')
+            self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+            self.assertEqual(response.data, {'detail': 'Failed to decrypt task data.'})
+
+        # Without the description the row can still be read and deleted.
+        response = client.get(reverse('task-detail', args=[self.task_2.id]), {'fields': 'id,title'}, headers={'Authorization': f'Bearer {refresh.access_token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = client.delete(reverse('task-supervisor-detail', args=[self.task_2.id]), headers=supervisor_headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Task.objects.filter(id=self.task_2.id).exists())
+
+
+    def test_user_get_task_list_not_modified(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        first_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            second_response = client.get(
+                url,
+                headers={'Authorization': f'Bearer {access}', 'If-None-Match': first_response['ETag']},
+                format='json'
+            )
+
+        self.assertEqual(first_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any('tasks_task' in query['sql'] for query in queries.captured_queries))
+
+    def test_user_get_task_list_modified_after_update(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        first_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        self.task_1.title = 'Updated test task 1'
+        self.task_1.save()
+
+        second_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}', 'If-None-Match': first_response['ETag']},
+            format='json'
+        )
+
+        self.assertEqual(second_response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(first_response['ETag'], second_response['ETag'])
+
+    def test_user_get_task_detail_not_modified(self):
+        client = APIClient()
+        url = reverse('task-detail', args=[self.task_1.id])
+        other_url = reverse('task-detail', args=[self.task_2.id])
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        first_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        # Changing a different task leaves this task's ETag valid.
+        self.task_2.title = 'Updated test task 2'
+        self.task_2.save()
+
+        second_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}', 'If-None-Match': first_response['ETag']},
+            format='json'
+        )
+
+        other_response = client.get(
+            other_url,
+            headers={'Authorization': f'Bearer {access}', 'If-None-Match': first_response['ETag']},
+            format='json'
+        )
+
+        self.assertEqual(second_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(other_response.status_code, status.HTTP_200_OK)
+
+
+    def test_user_get_task_list_served_from_response_cache(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        first_response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            second_response = client.get(
+                url,
+                headers={'Authorization': f'Bearer {access}'},
+                format='json'
+            )
+
+        self.assertEqual(second_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(first_response.content, second_response.content)
+        self.assertFalse(any('tasks_task' in query['sql'] for query in queries.captured_queries))
+
+    def test_supervisor_post_task_invalidates_response_cache(self):
+        client = APIClient()
+        url = reverse('task-supervisor-list')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        client.post(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'title': 'new title', 'description': 'new description'},
+            format='json'
+        )
+
+        response = client.get(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            format='json'
+        )
+
+        self.assertEqual(len(response.json()), 3)
+
+
+    def test_supervisor_bulk_create_tasks(self):
+        client = APIClient()
+        url = reverse('task-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+        new_tasks = [
+            {'title': f'bulk title {n}', 'description': f'bulk description {n}'}
+            for n in range(3)
+        ]
+
+        response = client.post(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data=new_tasks,
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        created = Task.objects.get(id=response.data[2]['id'])
+        self.assertEqual(created.description, 'bulk description 2')
+
+    def test_supervisor_bulk_create_tasks_with_invalid_item(self):
+        client = APIClient()
+        url = reverse('task-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        response = client.post(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data=[{'title': 'valid', 'description': 'valid'}, {'title': 'missing description'}],
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(0, response.data['errors'])
+        self.assertIn('description', response.data['errors'][1])
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_supervisor_bulk_update_tasks(self):
+        client = APIClient()
+        url = reverse('task-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        response = client.patch(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data=[
+                {'id': self.task_1.id, 'completed': True},
+                {'id': self.task_2.id, 'description': 'bulk updated description'},
+            ],
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.task_1.refresh_from_db()
+        self.task_2.refresh_from_db()
+        self.assertTrue(self.task_1.completed)
+        self.assertEqual(self.task_2.description, 'bulk updated description')
+        self.assertEqual(self.task_2.version, 2)
+
+    def test_supervisor_bulk_update_tasks_unknown_id(self):
+        client = APIClient()
+        url = reverse('task-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        response = client.patch(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data=[{'id': self.task_1.id, 'completed': True}, {'id': 0, 'completed': True}],
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['errors'], {'1': {'id': ['Not found.']}})
+        self.task_1.refresh_from_db()
+        self.assertFalse(self.task_1.completed)
+
+    def test_supervisor_bulk_delete_tasks(self):
+        client = APIClient()
+        url = reverse('task-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+        Task.objects.filter(id=self.task_2.id).update(completed=True)
+
+        by_filter = client.delete(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'filter': {'completed': True}},
+            format='json'
+        )
+
+        by_ids = client.delete(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'ids': [self.task_1.id]},
+            format='json'
+        )
+
+        self.assertEqual(by_filter.data, {'deleted': 1})
+        self.assertEqual(by_ids.data, {'deleted': 1})
+        self.assertFalse(Task.objects.exists())
+
+    def test_supervisor_bulk_delete_tasks_unknown_filter(self):
+        client = APIClient()
+        url = reverse('task-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        response = client.delete(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'filter': {'title__startswith': 'Test'}},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_user_bulk_complete_tasks(self):
+        client = APIClient()
+        url = reverse('task-bulk-complete')
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        response = client.post(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'ids': [self.task_1.id, self.task_2.id, 0]},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['updated']], [self.task_1.id, self.task_2.id])
+        self.task_1.refresh_from_db()
+        self.assertTrue(self.task_1.completed)
+        self.assertEqual(self.task_1.user_completed, self.secret_user)
+        self.assertEqual(self.task_1.date_completed, response.data['updated'][0]['date_completed'])
+        self.assertEqual(self.task_1.version, 2)
+
+    def test_user_bulk_uncomplete_tasks(self):
+        client = APIClient()
+        url = reverse('task-bulk-complete')
+        access = RefreshToken.for_user(self.secret_user).access_token
+        Task.objects.filter(id=self.task_1.id).update(completed=True, date_completed=datetime(2026, 1, 1, tzinfo=dt_timezone.utc))
+
+        response = client.post(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'ids': [self.task_1.id], 'completed': False},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task_1.refresh_from_db()
+        self.assertFalse(self.task_1.completed)
+        self.assertIsNone(self.task_1.date_completed)
+
+    def test_user_bulk_complete_tasks_unauthorized(self):
+        client = APIClient()
+        url = reverse('task-bulk-complete')
+        access = RefreshToken.for_user(self.regular_user).access_token
+
+        response = client.post(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data={'ids': [self.task_1.id]},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_user_completed_tasks_and_counter(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        headers = {'Authorization': f'Bearer {access}'}
+
+        client.put(reverse('task-detail', args=[self.task_1.id]), headers=headers, data={'completed': True}, format='json')
+        client.put(reverse('task-detail', args=[self.task_2.id]), headers=headers, data={'completed': True}, format='json')
+        first_page = client.get(reverse('task-completed'), {'page_size': 1}, headers=headers)
+        second_page = client.get(first_page.data['next'], headers=headers)
+
+        counter = CompletionCounter.objects.get(user=self.secret_user)
+        self.assertEqual(counter.total_completed, 2)
+        self.assertEqual(first_page.data['summary']['total_completed'], 2)
+        self.assertEqual(first_page.data['summary']['username'], 'secret_user')
+        self.assertEqual([task['id'] for task in first_page.data['results']], [self.task_2.id])
+        self.assertEqual([task['id'] for task in second_page.data['results']], [self.task_1.id])
+
+        client.put(reverse('task-detail', args=[self.task_2.id]), headers=headers, data={'completed': False}, format='json')
+        counter.refresh_from_db()
+        self.assertEqual(counter.total_completed, 1)
+        self.assertEqual(counter.last_completed_at, Task.objects.get(id=self.task_1.id).date_completed)
+
+        self.task_1.refresh_from_db()
+        self.task_1.delete()
+        counter.refresh_from_db()
+        self.assertEqual(counter.total_completed, 0)
+        self.assertIsNone(counter.last_completed_at)
+
+    def test_completed_tasks_page_through_identical_timestamps(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+        headers = {'Authorization': f'Bearer {access}'}
+        tasks = Task.objects.bulk_create([Task(title=f'Bulk {n}', description='Bulk') for n in range(5)])
+        ids = [self.task_1.id, self.task_2.id] + [task.id for task in tasks]
+        client.post(reverse('task-bulk-complete'), headers=headers, data={'ids': ids}, format='json')
+
+        seen = []
+        url = reverse('task-completed') + '?page_size=2'
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                page = client.get(url, headers=headers)
+                self.assertEqual(page.status_code, status.HTTP_200_OK)
+                seen += [task['id'] for task in page.data['results']]
+                url = page.data['next']
+        previous = client.get(page.data['previous'], headers=headers)
+
+        # One shared date_completed: the pages seek on (date_completed, id).
+        self.assertEqual(seen, sorted(ids, reverse=True))
+        self.assertFalse(any('OFFSET' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual([task['id'] for task in previous.data['results']], seen[-3:-1])
+
+    def test_bulk_writes_keep_completion_counter(self):
+        client = APIClient()
+        secret_access = RefreshToken.for_user(self.secret_user).access_token
+        supervisor_access = RefreshToken.for_user(self.supervisor_user).access_token
+
+        client.post(
+            reverse('task-bulk-complete'),
+            headers={'Authorization': f'Bearer {secret_access}'},
+            data={'ids': [self.task_1.id, self.task_2.id]},
+            format='json'
+        )
+        self.assertEqual(CompletionCounter.objects.get(user=self.secret_user).total_completed, 2)
+
+        client.patch(
+            reverse('task-supervisor-bulk'),
+            headers={'Authorization': f'Bearer {supervisor_access}'},
+            data=[{'id': self.task_1.id, 'completed': False}],
+            format='json'
+        )
+        self.assertEqual(CompletionCounter.objects.get(user=self.secret_user).total_completed, 1)
+
+        client.post(
+            reverse('task-supervisor-bulk'),
+            headers={'Authorization': f'Bearer {supervisor_access}'},
+            data=[{'title': 'Done', 'description': 'Done already.', 'completed': True, 'user_completed': self.supervisor_user.id}],
+            format='json'
+        )
+        self.assertEqual(CompletionCounter.objects.get(user=self.supervisor_user).total_completed, 1)
+
+        deleted = client.delete(
+            reverse('task-supervisor-bulk'),
+            headers={'Authorization': f'Bearer {supervisor_access}'},
+            data={'filter': {'completed': True}},
+            format='json'
+        )
+        self.assertEqual(deleted.data, {'deleted': 2})
+        self.assertEqual(CompletionCounter.objects.get(user=self.secret_user).total_completed, 0)
+        self.assertEqual(CompletionCounter.objects.get(user=self.supervisor_user).total_completed, 0)
+        self.assertEqual(TaskTombstone.objects.count(), 2)
+        self.assertFalse(TaskKeyword.objects.exclude(task_id=self.task_1.id).exists())
+
+    @override_settings(DELTA_SYNC_OVERLAP_SECONDS=0)
+    def test_user_get_task_delta_since_watermark(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+        Task.objects.update(updated_at=datetime(2026, 10, 1, tzinfo=dt_timezone.utc))
+
+        response = client.get(url, {'since': '0'}, headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['changed']), 2)
+        self.assertEqual(response.data['deleted'], [])
+        watermark = response.data['watermark']
+        self.assertEqual(watermark, '2026-10-01T00:00:00Z')
+
+        self.task_1.title = 'Changed title'
+        self.task_1.save()
+        deleted_id = self.task_2.id
+        self.task_2.delete()
+
+        with override_settings(TASK_TOMBSTONE_RETENTION_DAYS=36500):
+            response = client.get(url, {'since': watermark}, headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['changed']], [self.task_1.id])
+        self.assertEqual(response.data['changed'][0]['title'], 'Changed title')
+        self.assertEqual(response.data['deleted'], [deleted_id])
+        self.assertGreater(response.data['watermark'], watermark)
+        self.assertTrue(TaskTombstone.objects.filter(task_id=deleted_id).exists())
+
+    def test_save_returns_version_without_reloading(self):
+        task = Task.objects.get(id=self.task_1.id)
+        task.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            task.completed = True
+            task.save()
+
+        # The version comes back from the UPDATE, and the loaded state
+        # tasks.signals compares against is kept for the next save.
+        self.assertEqual(task.version, 3)
+        self.assertFalse(any(query['sql'].startswith('SELECT') and 'tasks_task' in query['sql'] for query in queries.captured_queries))
+
+    def test_deleting_user_touches_their_completed_tasks(self):
+        client = APIClient()
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.supervisor_user).access_token}'}
+        Task.objects.filter(id=self.task_1.id).update(completed=True, user_completed=self.secret_user, date_completed=timezone.now())
+        before = Task.objects.get(id=self.task_1.id)
+        untouched = Task.objects.get(id=self.task_2.id)
+        listed = client.get(reverse('task-supervisor-list'), headers=headers)
+        detail = client.get(reverse('task-supervisor-detail', args=[self.task_1.id]), headers=headers)
+
+        self.secret_user.delete()
+
+        after = Task.objects.get(id=self.task_1.id)
+        self.assertIsNone(after.user_completed_id)
+        self.assertEqual(after.version, before.version + 1)
+        self.assertGreater(after.updated_at, before.updated_at)
+        self.assertEqual(Task.objects.get(id=self.task_2.id).version, untouched.version)
+        response = client.get(reverse('task-supervisor-list'), headers={**headers, 'If-None-Match': listed['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(next(task for task in response.data if task['id'] == self.task_1.id)['user_completed'])
+        response = client.get(reverse('task-supervisor-detail', args=[self.task_1.id]), headers={**headers, 'If-None-Match': detail['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_user_get_task_delta_invalid_watermark(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        response = client.get(url, {'since': 'yesterday'}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = client.get(url, {'since': '2000-01-01T00:00:00Z'}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_supervisor_bulk_update_stamps_updated_at(self):
+        client = APIClient()
+        url = reverse('task-supervisor-bulk')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+        Task.objects.update(updated_at=datetime(2026, 10, 1, tzinfo=dt_timezone.utc))
+
+        response = client.patch(
+            url,
+            headers={'Authorization': f'Bearer {access}'},
+            data=[{'id': self.task_1.id, 'title': 'Renamed'}],
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.task_1.refresh_from_db()
+        self.assertGreater(self.task_1.updated_at, datetime(2026, 10, 1, tzinfo=dt_timezone.utc))
+
+    def daily_stats(self):
+        return (
+            sorted(DailyTaskStats.objects.exclude(created=0, completed=0).values_list('day', 'user_id', 'created', 'completed'), key=str),
+            TaskBacklog.objects.get(pk=1).open_tasks,
+        )
+
+    def test_task_writes_keep_daily_stats(self):
+        client = APIClient()
+        secret_access = RefreshToken.for_user(self.secret_user).access_token
+        supervisor_access = RefreshToken.for_user(self.supervisor_user).access_token
+        today = timezone.localdate()
+
+        client.put(reverse('task-detail', args=[self.task_1.id]), headers={'Authorization': f'Bearer {secret_access}'}, data={'completed': True}, format='json')
+        client.post(
+            reverse('task-bulk-complete'),
+            headers={'Authorization': f'Bearer {secret_access}'},
+            data={'ids': [self.task_2.id]},
+            format='json'
+        )
+        client.post(
+            reverse('task-supervisor-bulk'),
+            headers={'Authorization': f'Bearer {supervisor_access}'},
+            data=[{'title': 'New', 'description': 'New task.'}, {'title': 'Done', 'description': 'Done already.', 'completed': True, 'date_completed': '2026-01-05T12:00:00Z', 'user_completed': self.supervisor_user.id}],
+            format='json'
+        )
+        client.patch(
+            reverse('task-supervisor-bulk'),
+            headers={'Authorization': f'Bearer {supervisor_access}'},
+            data=[{'id': self.task_2.id, 'completed': False}],
+            format='json'
+        )
+        self.task_1.refresh_from_db()
+        self.task_1.delete()
+
+        incremental = self.daily_stats()
+        self.assertIn((today, None, 3, 0), incremental[0])
+        self.assertEqual(incremental[1], 2)
+        rebuild_task_stats()
+        self.assertEqual(self.daily_stats(), incremental)
+
+    def test_supervisor_get_task_stats(self):
+        client = APIClient()
+        url = reverse('task-supervisor-stats')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+        today = timezone.localdate()
+        self.task_1.completed = True
+        self.task_1.user_completed = self.secret_user
+        self.task_1.date_completed = timezone.now()
+        self.task_1.save()
+
+        start = today - timedelta(days=2)
+        response = client.get(url, {'start': start.isoformat(), 'end': today.isoformat()}, headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['open_backlog'], 1)
+        self.assertEqual([day['date'] for day in response.data['days']], [(start + timedelta(days=n)).isoformat() for n in range(3)])
+        self.assertEqual(response.data['days'][0], {'date': start.isoformat(), 'created': 0, 'completed': 0, 'completed_by_user': []})
+        self.assertEqual(response.data['days'][-1], {
+            'date': today.isoformat(),
+            'created': 2,
+            'completed': 1,
+            'completed_by_user': [{'user': self.secret_user.id, 'username': 'secret_user', 'completed': 1}],
+        })
+
+        with override_settings(STATS_MAX_DAYS=2):
+            response = client.get(url, {'start': start.isoformat()}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_search_task_descriptions(self):
+        client = APIClient()
+        url = reverse('task-list')
+        access = RefreshToken.for_user(self.secret_user).access_token
+        call_command('rebuild_task_keywords', stdout=open(os.devnull, 'w'))
+
+        response = client.get(url, {'search': 'DESCRIPTION task 2'}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data], [self.task_2.id])
+
+        response = client.get(url, {'search': 'description'}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual([task['id'] for task in response.data], [self.task_1.id, self.task_2.id])
+
+        response = client.get(url, {'search': '?!'}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_keyword_key_derived_from_first_rotation_key(self):
+        key = settings.FIELD_ENCRYPTION_KEY
+        single = keyword_tokens('vault')
+
+        with override_settings(FIELD_ENCRYPTION_KEY=[key, 'older-key']):
+            self.assertEqual(keyword_tokens('vault'), single)
+        with override_settings(FIELD_ENCRYPTION_KEY=('newer-key', key)):
+            self.assertNotEqual(keyword_tokens('vault'), single)
+
+    def test_rebuilding_keywords_invalidates_search_responses(self):
+        client = APIClient()
+        url = reverse('task-list')
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.secret_user).access_token}'}
+        call_command('rebuild_task_keywords', stdout=open(os.devnull, 'w'))
+        first = client.get(url, {'search': 'description'}, headers=headers)
+
+        with override_settings(KEYWORD_INDEX_KEY='rotated'):
+            call_command('rebuild_task_keywords', stdout=open(os.devnull, 'w'))
+            response = client.get(url, {'search': 'description'}, headers={**headers, 'If-None-Match': first['ETag']})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual([task['id'] for task in response.data], [self.task_1.id, self.task_2.id])
+
+    def test_task_writes_keep_keyword_index(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+        headers = {'Authorization': f'Bearer {access}'}
+
+        response = client.post(reverse('task-supervisor-list'), headers=headers, data={'title': 'New', 'description': 'Rotate the Vault keys'}, format='json')
+        task_id = response.data['id']
+        tokens = set(TaskKeyword.objects.filter(task_id=task_id).values_list('token', flat=True))
+        self.assertEqual({bytes(token) for token in tokens}, keyword_tokens('rotate the vault keys'))
+        self.assertNotIn(b'vault', b''.join(bytes(token) for token in tokens))
+
+        client.put(reverse('task-supervisor-detail', args=[task_id]), headers=headers, data={'description': 'Audit firewall'}, format='json')
+        response = client.get(reverse('task-supervisor-list'), {'search': 'vault'}, headers=headers)
+        self.assertEqual(response.data, [])
+
+        client.patch(reverse('task-supervisor-bulk'), headers=headers, data=[{'id': self.task_1.id, 'description': 'Audit the vault'}], format='json')
+        response = client.get(reverse('task-supervisor-list'), {'search': 'audit'}, headers=headers)
+        self.assertEqual([task['id'] for task in response.data], [self.task_1.id, task_id])
+
+    def test_task_writes_roll_back_with_keyword_index(self):
+        client = APIClient()
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.supervisor_user).access_token}'}
+        backlog = TaskBacklog.objects.get(pk=1).open_tasks
+
+        with mock.patch('tasks.serializers.index_task_keywords', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                client.post(reverse('task-supervisor-list'), headers=headers, data={'title': 'New', 'description': 'Rotate the vault keys'}, format='json')
+
+        self.assertFalse(Task.objects.filter(title='New').exists())
+        self.assertEqual(TaskBacklog.objects.get(pk=1).open_tasks, backlog)
+
+    def test_supervisor_search_task_titles(self):
+        client = APIClient()
+        url = reverse('task-supervisor-list')
+        access = RefreshToken.for_user(self.supervisor_user).access_token
+        prefix = Task.objects.create(title='Task review', description='Review.')
+
+        response = client.get(url, {'q': 'task', 'fields': 'id,title'}, headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {task['id'] for task in response.data['results']},
+            {prefix.id, self.task_1.id, self.task_2.id},
+        )
+        self.assertIsNone(response.data['next'])
+
+        response = client.get(url, {'q': 'review', 'completed': 'false'}, headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual([task['id'] for task in response.data['results']], [prefix.id])
+        self.assertEqual(response.data['results'][0]['description'], 'Review.')
+
+        # Equally relevant matches follow ?ordering=.
+        for ordering, expected in (('created_at', [self.task_1.id, self.task_2.id]), ('-created_at', [self.task_2.id, self.task_1.id])):
+            response = client.get(url, {'q': 'test task', 'ordering': ordering}, headers={'Authorization': f'Bearer {access}'})
+            self.assertEqual([task['id'] for task in response.data['results']], expected)
+
+    def test_supervisor_search_uses_trigram_index(self):
+        tasks = text_search(Task.objects.all(), 'title', 'review')
+
+        # The trigram index is on the bare column: it serves ILIKE, not the
+        # UPPER(title::text) LIKE UPPER(...) that icontains compiles to.
+        self.assertIn('"tasks_task"."title" ILIKE', str(tasks.query))
+        if not trigram_enabled():
+            self.skipTest('pg_trgm is not installed on this server.')
+
+        ciphertext = encrypt_many(['description'])[0]
+        Task.objects.bulk_create([Task(title=f'Task {i}', description=ciphertext) for i in range(5000)])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tasks_task')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('tasks_task_title_trgm', tasks.explain())
+
+    async def test_async_task_views_match_sync_views(self):
+        access = RefreshToken.for_user(self.secret_user).access_token
+        headers = {'Authorization': f'Bearer {access}'}
+        factory = AsyncRequestFactory()
+
+        for params in ({}, {'page_size': 1}, {'fields': 'id,title', 'completed': 'false'}):
+            response = await AsyncTaskList.as_view()(factory.get('/api/tasks/', params, headers=headers))
+            expected = await sync_to_async(self.client.get)(reverse('task-list'), params, headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.content, expected.content)
+            self.assertEqual(response['ETag'], expected['ETag'])
+
+        response = await AsyncTaskDetail.as_view()(factory.get(f'/api/tasks/{self.task_1.id}/', headers=headers), pk=self.task_1.id)
+        expected = await sync_to_async(self.client.get)(reverse('task-detail', args=[self.task_1.id]), headers=headers)
+        self.assertEqual(response.content, expected.content)
+
+        response = await AsyncTaskDetail.as_view()(
+            factory.get('/api/tasks/0/', headers={**headers, 'If-None-Match': expected['ETag']}), pk=self.task_1.id
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_async_task_views_errors_and_writes(self):
+        factory = AsyncRequestFactory()
+        secret_headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.secret_user).access_token}'}
+        regular_headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.regular_user).access_token}'}
+
+        response = await AsyncTaskList.as_view()(factory.get('/api/tasks/'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await AsyncTaskList.as_view()(factory.get('/api/tasks/', headers=regular_headers))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = await AsyncTaskList.as_view()(factory.get('/api/tasks/', {'fields': 'secret'}, headers=secret_headers))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await AsyncTaskDetail.as_view()(factory.get('/api/tasks/0/', headers=secret_headers), pk=0)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        await Task.objects.filter(id=self.task_2.id).aupdate(description=Ciphertext('not-a-fernet-token'))
+        response = await AsyncTaskDetail.as_view()(factory.get(f'/api/tasks/{self.task_2.id}/', headers=secret_headers), pk=self.task_2.id)
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(json.loads(response.content), {"detail": "Failed to decrypt task data."})
+
+        # Writes go to the DRF view.
+        request = factory.put(f'/api/tasks/{self.task_1.id}/', {'completed': True}, content_type='application/json', headers=secret_headers)
+        response = await AsyncTaskDetail.as_view()(request, pk=self.task_1.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue((await Task.objects.aget(id=self.task_1.id)).completed)
+
+    def test_supervisor_task_stats_etag(self):
+        client = APIClient()
+        url = reverse('task-supervisor-stats')
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.supervisor_user).access_token}'}
+        today = timezone.localdate()
+
+        first = client.get(url, headers=headers)
+        unchanged = client.get(url, headers={**headers, 'If-None-Match': first['ETag']})
+        explicit = client.get(url, {'end': today.isoformat()}, headers={**headers, 'If-None-Match': first['ETag']})
+        other_range = client.get(url, {'end': (today - timedelta(days=1)).isoformat()}, headers={**headers, 'If-None-Match': first['ETag']})
+        rebuild_task_stats()
+        rebuilt = client.get(url, headers={**headers, 'If-None-Match': first['ETag']})
+
+        self.assertEqual(unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+        # The same resolved range, spelled differently.
+        self.assertEqual(explicit.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(other_range.status_code, status.HTTP_200_OK)
+        self.assertEqual(rebuilt.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(rebuilt['ETag'], first['ETag'])
+
+    def test_user_get_task_stats_unauthorized(self):
+        client = APIClient()
+        access = RefreshToken.for_user(self.secret_user).access_token
+
+        response = client.get(reverse('task-supervisor-stats'), headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DecryptionCacheTest(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = DecryptionCache(maxsize=2)
+        cache.set(b'a', 'first')
+        cache.set(b'b', 'second')
+
+        # Touch 'a' so 'b' becomes the least recently used entry.
+        cache.get(b'a')
+        cache.set(b'c', 'third')
+
+        self.assertEqual(cache.get(b'a'), 'first')
+        self.assertIsNone(cache.get(b'b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['size'], 2)
+
+
+    @override_settings(DECRYPTION_CACHE_ENABLED=False, DECRYPTION_POOL_SIZE=3, DECRYPTION_PARALLEL_THRESHOLD=1)
+    def test_parallel_decrypt_many_preserves_order(self):
+        plaintexts = [f'description {n}' for n in range(10)]
+        ciphertexts = [encrypt_str(text).decode('utf-8') for text in plaintexts]
+
+        self.assertEqual(decrypt_many(ciphertexts + [None]), plaintexts + [None])
+
+    @override_settings(DECRYPTION_CACHE_ENABLED=False, DECRYPTION_POOL_SIZE=3, DECRYPTION_PARALLEL_THRESHOLD=1)
+    def test_parallel_decrypt_many_raises_invalid_token(self):
+        ciphertexts = [encrypt_str('valid').decode('utf-8'), 'not-a-fernet-token']
+
+        with self.assertRaises(InvalidToken):
+            decrypt_many(ciphertexts)
+
+    @override_settings(DECRYPTION_CACHE_ENABLED=False, DECRYPTION_POOL_SIZE=2, DECRYPTION_PARALLEL_THRESHOLD=1)
+    def test_decrypt_many_on_pool_thread_runs_inline(self):
+        # Offloaded serializations decrypt on the pool's own threads; fanning
+        # out from every one of them at once would leave none to do the work.
+        fields._executor = None
+        plaintexts = [f'description {n}' for n in range(10)]
+        ciphertexts = [encrypt_str(text).decode('utf-8') for text in plaintexts]
+
+        futures = [get_executor().submit(decrypt_many, ciphertexts) for _ in range(2)]
+
+        self.assertEqual([future.result(timeout=10) for future in futures], [plaintexts, plaintexts])
+        fields._executor = None
@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.urls import path
-from .views import TaskList, TaskDetail, TaskSupervisorList, TaskSupervisorDetail
+from .views import TaskList, TaskDetail, AsyncTaskList, AsyncTaskDetail, TaskBulkComplete, CompletedTaskList, TaskSupervisorList, TaskSupervisorDetail, TaskSupervisorBulk, TaskSupervisorStats
 
 urlpatterns = [
-    path('', TaskList.as_view(), name='task-list'),
-    path('<int:pk>/', TaskDetail.as_view(), name='task-detail'),
+    path('', (AsyncTaskList if settings.ASYNC_API_VIEWS else TaskList).as_view(), name='task-list'),
+    path('<int:pk>/', (AsyncTaskDetail if settings.ASYNC_API_VIEWS else TaskDetail).as_view(), name='task-detail'),
+    path('complete/', TaskBulkComplete.as_view(), name='task-bulk-complete'),
+    path('completed/', CompletedTaskList.as_view(), name='task-completed'),
     path('supervisor/', TaskSupervisorList.as_view(), name='task-supervisor-list'),
     path('supervisor/<int:pk>/', TaskSupervisorDetail.as_view(), name='task-supervisor-detail'),
+    path('supervisor/bulk/', TaskSupervisorBulk.as_view(), name='task-supervisor-bulk'),
+    path('supervisor/stats/', TaskSupervisorStats.as_view(), name='task-supervisor-stats'),
 ]
\ No newline at end of file
@@ -1,21 +1,79 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .serializers import TaskSerializer
-from .models import Task
+from .serializers import TaskSerializer, TaskCompletionSerializer, TaskStatsRangeSerializer, requested_fields, task_list_params, parse_watermark, format_watermark
+from .models import STATE_FIELDS, Task, TaskTombstone, CompletionCounter, DailyTaskStats, TaskBacklog
+from .counters import STATS_VERSION, record_task_changes, task_states
+from .keywords import index_task_keywords
+from .signals import bulk_task_delete
+from rest_framework import serializers
+from rest_framework.exceptions import APIException
+from secret_data.fields import defer_decryption, decrypt_deferred
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from cryptography.fernet import InvalidToken
 from secret_data.permissions import IsInSecretGroup, IsInSupervisorGroup
+from secret_data.pagination import TaskCursorPagination, CompletedTaskCursorPagination, SearchPagination
+from secret_data.search import search_query, text_search
+from secret_data.asyncapi import AsyncAPIView, offload, render
+from asgiref.sync import sync_to_async
+from secret_data.versioning import collection_etag, get_version, object_etag, single_version_bump
+from secret_data.bulk import bulk_items, bulk_partial_update, bulk_delete_queryset
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from secret_data.response_cache import cache_list_response
+from secret_data.streaming import queryset_batches, streaming_json_response
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
 from django.http import Http404
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.conf import settings
+
+
+class TaskDecryptionFailed(APIException):
+    # The detail views' counterpart of the list views' InvalidToken response.
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    default_detail = "Failed to decrypt task data."
+
+
+def task_list_queryset(fields, ordering=TaskCursorPagination.ordering, filters=None):
+    """
+    Queryset for the task list views, filtered, ordered and projected to the
+    requested fields.
+
+    Descriptions are selected as raw ciphertext and batch-decrypted by
+    TaskListSerializer instead of one row at a time.
+    """
+    tasks = Task.objects.filter(**(filters or {})).order_by(*ordering)
+    if fields is not None:
+        tasks = tasks.only(*fields, *(name.lstrip('-') for name in ordering))
+    if fields is None or 'description' in fields:
+        tasks = defer_decryption(tasks, 'description')
+    return tasks
+
         
 class TaskList(APIView):
     permission_classes = [IsAuthenticated, IsInSecretGroup]
 
+    @method_decorator(etag(collection_etag(Task)))
+    @cache_list_response(Task)
     def get(self, request):
         try:
-            tasks = Task.objects.all()
-            serializer = TaskSerializer(tasks, many=True)
+            fields = requested_fields(request)
+            if 'since' in request.query_params:
+                return self.delta(request, fields)
+
+            filters, ordering = task_list_params(request)
+            tasks = task_list_queryset(fields, ordering, filters)
+
+            paginator = TaskCursorPagination()
+            paginator.ordering = ordering
+            page = paginator.paginate_queryset(tasks, request, view=self)
+            if page is not None:
+                serializer = TaskSerializer(page, many=True, fields=fields)
+                return paginator.get_paginated_response(serializer.data)
+
+            serializer = TaskSerializer(tasks, many=True, fields=fields)
 
             return Response(serializer.data)
 
@@ -24,25 +82,78 @@ class TaskList(APIView):
                 {"detail": "Failed to decrypt task data."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )    
-    
+
+    def delta(self, request, fields):
+        """
+        Tasks created or changed, and ids deleted, after ?since=<watermark>.
+
+        Both lookups are range scans on indexed timestamps. The returned
+        watermark is the newest change seen (or the one passed in), so an
+        unchanged collection keeps answering with the same body. Changes from
+        DELTA_SYNC_OVERLAP_SECONDS before the watermark are sent again;
+        clients apply them by id, so repeats are harmless.
+        """
+        since = parse_watermark(request.query_params['since'])
+        tasks = task_list_queryset(fields, ordering=('updated_at', 'id'))
+        deleted = []
+
+        if since is not None:
+            if since < timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS):
+                return Response(
+                    {"detail": "Watermark is older than the tombstone retention; fetch the full list."},
+                    status=status.HTTP_410_GONE
+                )
+            start = since - timedelta(seconds=settings.DELTA_SYNC_OVERLAP_SECONDS)
+            tasks = tasks.filter(updated_at__gt=start)
+            deleted = list(
+                TaskTombstone.objects.filter(deleted_at__gt=start)
+                .order_by('deleted_at')
+                .values_list('task_id', 'deleted_at')
+            )
+
+        tasks = list(tasks)
+        candidates = [since] if since is not None else []
+        if tasks:
+            candidates.append(tasks[-1].updated_at)
+        if deleted:
+            candidates.append(deleted[-1][1])
+        watermark = max(candidates, default=None)
+        serializer = TaskSerializer(tasks, many=True, fields=fields)
+
+        return Response({
+            'watermark': format_watermark(watermark) if watermark is not None else '0',
+            'changed': serializer.data,
+            'deleted': sorted({task_id for task_id, _ in deleted}),
+        })
+
 class TaskDetail(APIView):
     permission_classes = [IsAuthenticated, IsInSecretGroup]
 
-    def get_object(self, pk):
+    def get_object(self, pk, fields=None, lock=False):
         try:
-            return Task.objects.get(id=pk)
+            tasks = Task.objects.select_for_update() if lock else Task.objects.all()
+            if fields is not None:
+                tasks = tasks.only(*fields)
+            return tasks.get(id=pk)
 
         except Task.DoesNotExist:
             raise Http404
+        except InvalidToken:
+            raise TaskDecryptionFailed
 
+    @method_decorator(etag(object_etag(Task)))
     def get(self, request, pk, format=None):
-        task = self.get_object(pk)
-        serializer = TaskSerializer(task)
+        fields = requested_fields(request)
+        task = self.get_object(pk, fields)
+        serializer = TaskSerializer(task, fields=fields)
         return Response(serializer.data)
 
     
+    @transaction.atomic
     def put(self, request, pk, format=None):
-        task = self.get_object(pk)
+        # Locked so concurrent puts can't both count the same completion in
+        # CompletionCounter, which tasks.signals updates in this transaction.
+        task = self.get_object(pk, lock=True)
 
         # if 'date_completed' not in request.data:
         #     request.data['date_completed'] = datetime.now()
@@ -74,15 +185,172 @@ class TaskDetail(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class AsyncTaskList(AsyncAPIView):
+    sync_view = TaskList
+    required_group = 'Secret'
+    etag_func = staticmethod(collection_etag(Task))
+
+    async def get(self, request):
+        if 'since' in request.query_params:
+            return await sync_to_async(self._sync_handler)(request)
+
+        fields = requested_fields(request)
+        filters, ordering = task_list_params(request)
+        tasks = task_list_queryset(fields, ordering, filters)
+
+        paginator = TaskCursorPagination()
+        paginator.ordering = ordering
+        page = await sync_to_async(paginator.paginate_queryset)(tasks, request, view=self)
+        rows = page if page is not None else [task async for task in tasks]
+        try:
+            data = await offload(lambda: TaskSerializer(rows, many=True, fields=fields).data)
+        except InvalidToken:
+            return render({"detail": "Failed to decrypt task data."}, status=500)
+
+        if page is not None:
+            return render(paginator.get_paginated_response(data).data)
+        return render(data)
+
+class AsyncTaskDetail(AsyncAPIView):
+    sync_view = TaskDetail
+    required_group = 'Secret'
+    etag_func = staticmethod(object_etag(Task))
+
+    async def get(self, request, pk):
+        fields = requested_fields(request)
+        tasks = Task.objects.all()
+        if fields is not None:
+            tasks = tasks.only(*fields)
+        if fields is None or 'description' in fields:
+            tasks = defer_decryption(tasks, 'description')
+        try:
+            task = await tasks.aget(id=pk)
+        except Task.DoesNotExist:
+            raise Http404
+
+        def serialize():
+            decrypt_deferred([task], 'description')
+            return TaskSerializer(task, fields=fields).data
+
+        try:
+            return render(await offload(serialize))
+        except InvalidToken:
+            return render({"detail": "Failed to decrypt task data."}, status=500)
+
+class TaskBulkComplete(APIView):
+    permission_classes = [IsAuthenticated, IsInSecretGroup]
+
+    def post(self, request, format=None):
+        # Marks many tasks complete (or not) in one UPDATE instead of a
+        # TaskDetail.put per task; descriptions are never touched.
+        serializer = TaskCompletionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        completed = serializer.validated_data['completed']
+        date_completed = timezone.now() if completed else None
+
+        with transaction.atomic(), single_version_bump(Task):
+            rows = list(
+                Task.objects.select_for_update()
+                .filter(id__in=serializer.validated_data['ids'])
+                .values_list('id', *STATE_FIELDS)
+            )
+            affected = [task_id for task_id, *_ in rows]
+            Task.objects.filter(id__in=affected).update(
+                completed=completed,
+                user_completed=request.user.id,
+                date_completed=date_completed,
+                updated_at=timezone.now(),
+                version=F('version') + 1,
+            )
+            record_task_changes(
+                [tuple(state) for _, *state in rows],
+                [(created_at, completed, request.user.id, date_completed) for _, created_at, *_ in rows],
+            )
+
+        return Response({
+            'updated': [{'id': task_id, 'date_completed': date_completed} for task_id in sorted(affected)],
+        }, status=status.HTTP_200_OK)
+
+class CompletedTaskList(APIView):
+    permission_classes = [IsAuthenticated, IsInSecretGroup]
+
+    def get(self, request, format=None):
+        # The caller's completed tasks, newest first, keyset-paginated over
+        # the (user_completed, date_completed) index; the summary is one
+        # CompletionCounter row rather than a COUNT.
+        try:
+            fields = requested_fields(request)
+            tasks = task_list_queryset(fields, CompletedTaskCursorPagination.ordering, {
+                'user_completed_id': request.user.id,
+                'completed': True,
+                'date_completed__isnull': False,
+            })
+
+            paginator = CompletedTaskCursorPagination()
+            page = paginator.paginate_queryset(tasks, request, view=self)
+            serializer = TaskSerializer(page, many=True, fields=fields)
+            response = paginator.get_paginated_response(serializer.data)
+
+        except InvalidToken:
+            return Response(
+                {"detail": "Failed to decrypt task data."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        counter = CompletionCounter.objects.filter(user_id=request.user.id).first()
+        response.data['summary'] = {
+            'username': request.user.username,
+            'total_completed': counter.total_completed if counter else 0,
+            'last_completed_at': serializers.DateTimeField().to_representation(counter.last_completed_at)
+                if counter and counter.last_completed_at else None,
+        }
+        return response
+
 class TaskSupervisorList(APIView):
     permission_classes = [IsAuthenticated, IsInSupervisorGroup]
 
+    @method_decorator(etag(collection_etag(Task)))
+    @cache_list_response(Task)
     def get(self, request, format=None):
-        tasks = Task.objects.all()
-        serializer = TaskSerializer(tasks, many=True)
-        return Response(serializer.data)
+        try:
+            fields = requested_fields(request)
+            filters, ordering = task_list_params(request)
+            tasks = task_list_queryset(fields, ordering, filters)
+            query = search_query(request)
+            if query is not None:
+                tasks = text_search(tasks, 'title', query, ordering)
+
+            if request.query_params.get('stream') == 'true':
+                # Full exports: rows are read, decrypted and written one batch
+                # at a time instead of building the whole list in memory.
+                return streaming_json_response(
+                    queryset_batches(tasks, settings.STREAM_CHUNK_SIZE),
+                    TaskSerializer(fields=fields),
+                    prepare=lambda batch: decrypt_deferred(batch, 'description'),
+                )
+
+            if query is not None:
+                paginator = SearchPagination()
+            else:
+                paginator = TaskCursorPagination()
+                paginator.ordering = ordering
+            page = paginator.paginate_queryset(tasks, request, view=self)
+            if page is not None:
+                serializer = TaskSerializer(page, many=True, fields=fields)
+                return paginator.get_paginated_response(serializer.data)
+
+            serializer = TaskSerializer(tasks, many=True, fields=fields)
+            return Response(serializer.data)
+
+        except InvalidToken:
+            return Response(
+                {"detail": "Failed to decrypt task data."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
+    @transaction.atomic
     def post(self, request, format=None):
+        # The keyword index and counters are written with the row.
         serializer = TaskSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -90,23 +358,122 @@ class TaskSupervisorList(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class TaskSupervisorBulk(APIView):
+    permission_classes = [IsAuthenticated, IsInSupervisorGroup]
+    delete_filter_fields = ['completed', 'user_completed', 'created_at__lt', 'created_at__gte']
+
+    def post(self, request, format=None):
+        serializer = TaskSerializer(data=bulk_items(request.data), many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(), single_version_bump(Task):
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request, format=None):
+        items = bulk_items(request.data)
+        ids = [item['id'] for item in items if isinstance(item, dict) and isinstance(item.get('id'), int)]
+        with transaction.atomic(), single_version_bump(Task):
+            before = task_states(Task.objects.select_for_update().filter(id__in=ids))
+            updated = bulk_partial_update(Task.objects.defer('description'), TaskSerializer, items)
+            # bulk_update() sends no post_save; apply the difference to the counters here.
+            record_task_changes(before, task_states(Task.objects.filter(id__in=ids)))
+            # Nor does it go through TaskSerializer.update(), which reindexes descriptions.
+            index_task_keywords({pk: data['description'] for pk, data in updated.items() if 'description' in data})
+        return Response({'updated': list(updated)}, status=status.HTTP_202_ACCEPTED)
+
+    def delete(self, request, format=None):
+        with transaction.atomic(), single_version_bump(Task):
+            tasks = bulk_delete_queryset(Task.objects.all(), request.data, self.delete_filter_fields)
+            rows = list(tasks.select_for_update().values_list('id', *STATE_FIELDS))
+            ids = [task_id for task_id, *_ in rows]
+            # Loaded as ids only for the deletion collector, which cascades
+            # to TaskKeyword; tombstones and counters are recorded once for
+            # the batch instead of per row by tasks.signals.task_deleted.
+            with bulk_task_delete():
+                _, deleted = Task.objects.filter(id__in=ids).only('id').delete()
+            TaskTombstone.objects.bulk_create([TaskTombstone(task_id=task_id) for task_id in ids])
+            record_task_changes([tuple(state) for _, *state in rows], [])
+        return Response({'deleted': deleted.get(Task._meta.label, 0)}, status=status.HTTP_200_OK)
+
+def stats_etag(request, *args, **kwargs):
+    # The resolved range rather than the query string: a request without
+    # ?end= covers a different range once the day changes. None for an
+    # invalid range lets the view return the 400.
+    serializer = TaskStatsRangeSerializer(data=request.query_params.dict())
+    if not serializer.is_valid():
+        return None
+    start, end = serializer.validated_data['start'], serializer.validated_data['end']
+    label = Task._meta.label_lower
+    return f'{label}-stats-{get_version(label)}-{get_version(STATS_VERSION)}-{start.isoformat()}-{end.isoformat()}'
+
+class TaskSupervisorStats(APIView):
+    permission_classes = [IsAuthenticated, IsInSupervisorGroup]
+
+    @method_decorator(etag(stats_etag))
+    def get(self, request, format=None):
+        # Tasks created and completed per day (and completions per user) over
+        # ?start=&end=, read from the DailyTaskStats rollup: a range scan on
+        # (day, user) whose cost depends on the number of days, not tasks.
+        serializer = TaskStatsRangeSerializer(data=request.query_params.dict())
+        serializer.is_valid(raise_exception=True)
+        start, end = serializer.validated_data['start'], serializer.validated_data['end']
+
+        days = {}
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            days[day] = {'date': day.isoformat(), 'created': 0, 'completed': 0, 'completed_by_user': []}
+
+        rows = (
+            DailyTaskStats.objects.filter(day__range=(start, end))
+            .select_related('user')
+            .order_by('day', 'user_id')
+        )
+        for row in rows:
+            entry = days[row.day]
+            if row.user_id is None:
+                entry['created'], entry['completed'] = row.created, row.completed
+            elif row.completed:
+                entry['completed_by_user'].append({
+                    'user': row.user_id,
+                    'username': row.user.username,
+                    'completed': row.completed,
+                })
+
+        backlog = TaskBacklog.objects.filter(pk=1).first()
+        return Response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'open_backlog': backlog.open_tasks if backlog else Task.objects.filter(completed=False).count(),
+            'days': list(days.values()),
+        }, status=status.HTTP_200_OK)
+
 class TaskSupervisorDetail(APIView):
     permission_classes = [IsAuthenticated, IsInSupervisorGroup]
 
-    def get_object(self, pk):
+    def get_object(self, pk, fields=None, lock=False):
         try:
-            return Task.objects.get(id=pk)
+            tasks = Task.objects.select_for_update() if lock else Task.objects.all()
+            if fields is not None:
+                tasks = tasks.only(*fields)
+            return tasks.get(id=pk)
         
         except Task.DoesNotExist:
             raise Http404
+        except InvalidToken:
+            raise TaskDecryptionFailed
 
+    @method_decorator(etag(object_etag(Task)))
     def get(self, request, pk, format=None):
-        task = self.get_object(pk)
-        serializer = TaskSerializer(task)
+        fields = requested_fields(request)
+        task = self.get_object(pk, fields)
+        serializer = TaskSerializer(task, fields=fields)
         return Response(serializer.data)
 
+    @transaction.atomic
     def put(self, request, pk, format=None):
-        task = self.get_object(pk)
+        task = self.get_object(pk, lock=True)
         serializer = TaskSerializer(task, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -114,7 +481,9 @@ class TaskSupervisorDetail(APIView):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
+    @transaction.atomic
     def delete(self, request, pk, format=None):
-        task = self.get_object(pk)
+        # The description isn't needed, so an undecryptable one can't block the delete.
+        task = self.get_object(pk, [name for name in TaskSerializer.Meta.fields if name != 'description'])
         task.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file